@@ -0,0 +1,36 @@
+#python entry point so the scripts can be run as: python src <command> [options]
+# Each command's module is only imported once it is picked, so "python src --help" loads no matplotlib or pandas
+import argparse
+import importlib
+import os
+import sys
+
+# Command name -> (module in this folder, help text)
+commands = {
+    "timeline": ("timeline7", "Draw the spiral activity timeline from the csv"),
+    "tote": ("tote", "Draw the spiral and magic wand artwork for the tote bag"),
+    "legends": ("ministar", "Save a mini star swirl legend for each activity type"),
+    "watch": ("watch", "Redraw a low resolution preview whenever the csv, icons or colors change"),
+    "benchmark": ("benchmark", "Time draw_timeline on made up activity logs"),
+}
+
+
+# Function to pick a command and hand the rest of the arguments to its module's main()
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python src", description="Timeline graphic design scripts")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (module, help_text) in commands.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+
+    # The modules import each other by name, so this folder has to be on the path (it is when run as "python src")
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+
+    module = importlib.import_module(commands[args.command][0])
+    return module.main(rest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#python module to work out everything the timeline draws for each activity once, as whole columns
+import textwrap
+
+import numpy as np
+
+# Hearts in the silver star for each energy level
+heart_counts = {"high": 3, "medium": 2, "low": 1}
+
+# Companionship icon for "Alone", every other value gets the one with the boyfriend
+alone_icon = "icons/cinderella-alone.png"
+with_bf_icon = "icons/cinderella-with bf.png"
+
+
+# Function to split every distinct 'Activity Type' once and hand each row its tuple of types
+def split_types(column):
+    """
+    "eating, relaxing" is split into ("eating", "relaxing"). A log only has a handful of distinct type
+    strings, so they are split once per category and the rows just pick theirs by category code.
+    Rows without a type get an empty tuple.
+    """
+    column = column.astype("category")
+    categories = [tuple(str(types).split(', ')) for types in column.cat.categories] + [()]
+    # Missing values have code -1, which picks the empty tuple on the end
+    return [categories[code] for code in column.cat.codes.to_numpy()]
+
+
+# Every column draw_activity needs, worked out for the whole log before anything is drawn
+class Activities:
+    """
+    Built once per render from the DataFrame, so drawing a row only indexes plain lists and arrays:
+
+    :param types: Tuple of activity types per row
+    :param num_types: Number of activity types per row (one set of stars is drawn per type)
+    :param hearts: Hearts in the silver star per row, from 'Energy Level'
+    :param companion_icons: Companionship icon path per row, from 'Who Im with'
+    :param start_labels: Start time formatted as "08:30 AM" per row
+    :param descriptions: 'Activity Description' per row
+    :param sleep, car_ride, walking: Whether the lower case description mentions it
+    :param show_description: Rows that get the description burst (none of the three above)
+    :param wrapped: Description wrapped to fit in its burst star (empty where it isn't shown)
+    :param drawn: Positions of the rows that get drawn, which are also their spots on the spiral
+    """
+
+    def __init__(self, df, first_burst=0):
+        self.types = split_types(df['Activity Type'])
+        self.num_types = np.fromiter(map(len, self.types), dtype=int, count=len(self.types))
+
+        energy = df['Energy Level'].astype(object).map(heart_counts)
+        if energy.isna().any():
+            raise KeyError(f"Unknown energy levels: {sorted(set(df['Energy Level'][energy.isna()].astype(str)))}")
+        self.hearts = energy.to_numpy(dtype=int)
+
+        self.companion_icons = np.where(df['Who Im with'].astype(object).to_numpy() == "Alone", alone_icon, with_bf_icon)
+        self.start_labels = df['Start time'].dt.strftime("%I:%M %p").fillna("").to_numpy(dtype=object)
+
+        descriptions = df['Activity Description'].astype("string").fillna("")
+        lowered = descriptions.str.lower()
+        self.descriptions = descriptions.to_numpy(dtype=object)
+        self.sleep = lowered.str.contains("sleep", regex=False).to_numpy(dtype=bool)
+        self.car_ride = lowered.str.contains("car ride", regex=False).to_numpy(dtype=bool)
+        self.walking = lowered.str.contains("walking", regex=False).to_numpy(dtype=bool)
+        self.show_description = ~(self.sleep | self.car_ride | self.walking)
+
+        # Only the descriptions that are shown need wrapping, and each distinct one only once
+        shown = descriptions[self.show_description]
+        wrapped = {text: textwrap.fill(text, width=10) for text in shown.unique()}
+        self.wrapped = np.full(len(df), "", dtype=object)
+        self.wrapped[self.show_description] = shown.map(wrapped).to_numpy(dtype=object)
+
+        self.drawn = np.arange(min(first_burst, len(df)), len(df))
+
+    def __len__(self):
+        return len(self.types)
@@ -0,0 +1,76 @@
+#python module to decode the timeline icons once and share them between renders
+from collections import OrderedDict
+
+from PIL import Image
+
+
+# Cache of decoded icons, including the resized variants used by the fun icons
+class IconCache:
+    """
+    Keeps decoded icon images in memory keyed by (path, scale).
+
+    The least recently used images are evicted once the decoded pixel data
+    goes over max_bytes.
+
+    :param max_bytes: Memory budget for all decoded images (in bytes)
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Function to get an icon, decoding (and resizing) it only on the first request
+    def get(self, path, scale=1.0):
+        key = (path, scale)
+        if key in self.images:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return self.images[key]
+
+        self.misses += 1
+        if scale == 1.0:
+            img = Image.open(path)
+            img.load()  # Decode now so later renders never touch the disk
+        else:
+            original = self.get(path)
+            new_size = (int(original.width * scale), int(original.height * scale))
+            img = original.resize(new_size, Image.Resampling.LANCZOS)
+
+        self.images[key] = img
+        self.total_bytes += image_bytes(img)
+        self.evict()
+        return img
+
+    # Function to drop the least recently used images until we are back under the budget
+    def evict(self):
+        # Always keep the most recent image, even if it is bigger than the budget on its own
+        while self.total_bytes > self.max_bytes and len(self.images) > 1:
+            _, img = self.images.popitem(last=False)
+            self.total_bytes -= image_bytes(img)
+            self.evictions += 1
+
+    def clear(self):
+        self.images.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "images": len(self.images),
+            "bytes": self.total_bytes,
+        }
+
+
+# Function to estimate how much memory a decoded image uses
+def image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+# Shared cache used by all of the icon factories
+icon_cache = IconCache()
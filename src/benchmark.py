@@ -0,0 +1,158 @@
+#python script to time how draw_timeline scales with rows, activity types per row, dpi and figure size
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from lod import pick_lod
+from profiling import peak_rss_mb
+
+
+# Function to run one benchmark case (called in a fresh process so the peak memory is its own)
+def run_case(num_rows, fanout, dpi, figsize, seed=0, layout="spiral", lod=None):
+    """
+    :param lod: Level of detail to draw with, or None to pick it from dpi and figsize like the timeline does
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from ingest import load_days
+    from lod import level_of_detail, pick_lod
+    from synthetic import write_activity_log
+    from timeline7 import activity_colors, build_timeline, layout_path
+
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_activity_log(os.path.join(tmp, "activities.csv"), num_rows, activity_colors,
+                                      max_types_per_row=fanout, rng=rng)
+
+        start = time.perf_counter()
+        df = load_days(csv_path, ["Day 1"])
+        ingest_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    layout_path(len(df), layout)
+    layout_s = time.perf_counter() - start
+
+    lod = lod or pick_lod(dpi, (figsize, figsize))
+    start = time.perf_counter()
+    with level_of_detail(lod):
+        fig = build_timeline(df, activity_colors, rng=rng, figsize=(figsize, figsize), layout=layout)
+    artists_s = time.perf_counter() - start
+    num_artists = len(fig.axes[0].get_children())
+
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, transparent=True)
+    savefig_s = time.perf_counter() - start
+    plt.close(fig)
+
+    return {
+        "rows": num_rows,
+        "fanout": fanout,
+        "dpi": dpi,
+        "figsize": figsize,
+        "layout": layout,
+        "lod": lod,
+        "ingest_s": ingest_s,
+        "layout_s": layout_s,
+        "artists_s": artists_s,
+        "savefig_s": savefig_s,
+        "artists": num_artists,
+        "png_bytes": buffer.getbuffer().nbytes,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# Function to run every combination of sizes, each in its own process
+def run_benchmarks(rows, fanouts, dpis, figsizes, seed=0, layout="spiral", lods=(None,)):
+    """
+    :param lods: Levels of detail to draw each size with, None picks it from the dpi and figure size
+    """
+    results = []
+    for figsize in figsizes:
+        for dpi in dpis:
+            for lod in lods:
+                for fanout in fanouts:
+                    for num_rows in rows:
+                        # Same pick as run_case, so a case that dies still says which profile it was drawing
+                        case_lod = lod or pick_lod(dpi, (figsize, figsize))
+                        try:
+                            with ProcessPoolExecutor(max_workers=1) as pool:
+                                result = pool.submit(run_case, num_rows, fanout, dpi, figsize, seed, layout,
+                                                     case_lod).result()
+                        except BrokenProcessPool:
+                            # Usually the worker was killed for running out of memory, keep going with the other sizes
+                            results.append({"rows": num_rows, "fanout": fanout, "dpi": dpi, "figsize": figsize,
+                                            "lod": case_lod, "error": "worker process died (out of memory?)"})
+                            print(f"{num_rows:>5} rows  fanout {fanout}  {dpi:>3} dpi  {figsize} in  {case_lod}: "
+                                  f"worker process died")
+                            continue
+                        results.append(result)
+                        print(f"{num_rows:>5} rows  fanout {fanout}  {dpi:>3} dpi  {figsize} in  {case_lod}: "
+                              f"ingest {result['ingest_s']:.3f}s  layout {result['layout_s']:.4f}s  "
+                              f"artists {result['artists_s']:.2f}s  savefig {result['savefig_s']:.2f}s  "
+                              f"peak {result['peak_rss_mb']} MB")
+    return results
+
+
+# Function to time how long a fresh python process takes to run a command that does no drawing (e.g. --help)
+def cold_start(args=("--help",), runs=5):
+    src = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, src, *args], check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return {"command": " ".join(["python src", *args]), "runs": runs, "median_s": float(np.median(times)),
+            "min_s": min(times)}
+
+
+# Function to run the script from the command line (also used by "python src benchmark")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time draw_timeline on made up activity logs")
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 100, 500, 1000, 5000])
+    parser.add_argument("--fanout", type=int, nargs="+", default=[1, 3], help="Most activity types per row")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[30])
+    parser.add_argument("--figsize", type=float, nargs="+", default=[72], help="Width and height in inches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--layout", choices=["spiral", "arc"], default="spiral")
+    parser.add_argument("--lod", choices=["auto", "thumbnail", "draft", "print"], nargs="+", default=["auto"],
+                        help="Levels of detail to time each size with (auto picks it from the dpi and figure size)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--cold-start", type=int, metavar="RUNS",
+                        help="Only time RUNS fresh runs of 'python src --help' and 'python src timeline --help'")
+    args = parser.parse_args(argv)
+
+    if args.cold_start:
+        for command in (("--help",), ("timeline", "--help")):
+            result = cold_start(command, args.cold_start)
+            print(f"{result['command']}: median {result['median_s']:.3f}s  best {result['min_s']:.3f}s "
+                  f"over {result['runs']} runs")
+        return
+
+    lods = [None if lod == "auto" else lod for lod in args.lod]
+    results = run_benchmarks(args.rows, args.fanout, args.dpi, args.figsize, seed=args.seed, layout=args.layout,
+                             lods=lods)
+    with open(args.output, "w") as file:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "results": results,
+        }, file, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
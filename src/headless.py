@@ -0,0 +1,58 @@
+#python module to render many timelines in a row without a display, on one reused figure
+import gc
+
+
+# Function to make sure nothing opens a window (pyplot is switched too, if something already imported it)
+def use_agg():
+    import sys
+
+    import matplotlib
+    if "matplotlib.pyplot" in sys.modules:
+        sys.modules["matplotlib.pyplot"].switch_backend("Agg")
+    else:
+        matplotlib.use("Agg")
+
+
+# One Agg figure and canvas shared by consecutive renders
+class ReusableFigure:
+    """
+    Keeps a single figure alive for a batch of renders instead of making a new 72x72 figure each time.
+
+    The figure is made without pyplot, so it is never registered with a window manager and can't
+    be left open by accident. take() clears the last render's artists before handing the figure out
+    again, and the Agg canvas keeps its pixel buffer between renders of the same size and dpi.
+    Call release() at the end of the batch to drop the artists and the buffer.
+
+    :param figsize: Width and height of the figure in inches
+    """
+
+    def __init__(self, figsize=(72, 72)):
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=figsize)
+        self.new_canvas()
+        self.renders = 0
+
+    # Function to attach a fresh Agg canvas (the old one and its pixel buffer are dropped)
+    def new_canvas(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        FigureCanvasAgg(self.figure)
+
+    # Function to get the figure cleared and sized for the next render
+    def take(self, figsize=(72, 72)):
+        self.clear()
+        self.figure.set_size_inches(figsize)
+        self.renders += 1
+        return self.figure
+
+    # Function to remove every artist from the last render (images, collections, text)
+    def clear(self):
+        self.figure.clear()
+        # Axes and artists point at each other, so collect them now rather than whenever gc gets round to it
+        gc.collect()
+
+    # Function to free everything the figure holds once the batch is done
+    def release(self):
+        self.clear()
+        self.new_canvas()
@@ -0,0 +1,330 @@
+#python module to redraw only the activities that changed since the last render
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from activities import Activities
+from headless import ReusableFigure, use_agg
+from lod import detail, level_of_detail, pick_lod
+from profiling import stage
+from sparkles import draw_sparkle_trail
+from stars import StarBatch
+from tiled import render_tile, strip_height, write_png
+from timeline7 import activity_colors, day_slug, draw_activity, draw_wand, first_burst, layout_path, setup_axes
+
+# Bump this when the drawing code changes, so fragments cached by an older version are redrawn
+cache_version = 3
+
+# Area around an activity's spot on the spiral that its artists can reach (data units: left, right, below, above)
+activity_margin = (25, 25, 30, 20)
+
+# Area around the spiral path that the sparkle trail can reach (jitter plus the biggest sparkle)
+sparkle_margin = 5
+
+# Tallest layer image kept in the cache (in pixels)
+band_rows = 2048
+
+# Fragments on disk that no render has used for this long are deleted by prune (in seconds)
+fragment_max_age = 7 * 24 * 60 * 60
+
+
+# Function to describe the icons folder, so editing any icon redraws everything that might use it
+def icons_signature(icons_dir="icons"):
+    if not os.path.isdir(icons_dir):
+        return []
+    return sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size) for entry in os.scandir(icons_dir))
+
+
+# Function to hash everything a fragment depends on into a short file-safe key
+def fingerprint(*parts):
+    return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+# One activity (or the wand, or the sparkle trail) rendered as a stack of cropped transparent layers
+class Fragment:
+    """
+    :param key: Fingerprint of everything the fragment was drawn from
+    :param layers: List of (zorder, kind, left, top, image), kind is "batch" for the star/stamp batches
+                   and "own" for the activity's own artists; left/top are pixels from the top left corner
+    """
+
+    def __init__(self, key, layers):
+        self.key = key
+        self.layers = layers
+
+    # Function to save the fragment as one PNG per layer and a JSON index
+    def save(self, cache_dir):
+        index = []
+        for number, (zorder, kind, left, top, image) in enumerate(self.layers):
+            file_name = f"{self.key}_{number}.png"
+            image.save(os.path.join(cache_dir, file_name), "PNG", compress_level=1)
+            index.append({"zorder": zorder, "kind": kind, "left": left, "top": top, "file": file_name})
+        with open(os.path.join(cache_dir, f"{self.key}.json"), "w") as file:
+            json.dump(index, file)
+
+    # Function to load a saved fragment (None if it was never saved)
+    @classmethod
+    def load(cls, cache_dir, key):
+        index_path = os.path.join(cache_dir, f"{key}.json")
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path) as file:
+            index = json.load(file)
+        # The index's modified time is when the fragment was last used, which is what prune goes by
+        os.utime(index_path)
+        layers = []
+        for layer in index:
+            image = Image.open(os.path.join(cache_dir, layer["file"]))
+            image.load()
+            layers.append((layer["zorder"], layer["kind"], layer["left"], layer["top"], image))
+        return cls(key, layers)
+
+
+# Draws timelines from cached per-activity fragments, redrawing only the fragments whose inputs changed
+class IncrementalRenderer:
+    """
+    Every activity row is fingerprinted together with its spot on the spiral, and its artists are
+    rendered once into cropped layers (one per zorder). A render then only draws the rows whose
+    fingerprint is new and alpha-composites all the layers in matplotlib's drawing order: by zorder,
+    then the wand, the star/stamp batches, each activity's own artists and finally the sparkle trail.
+
+    Fragments are kept in memory and, with a cache_dir, on disk so the next run can reuse them.
+    Adding or removing a row moves every spot on the spiral, so that redraws every activity.
+    prune deletes the fragments on disk that haven't been used for a week (other days' fragments
+    are kept while they are still being worked on).
+
+    :param dpi: Resolution of the output
+    :param figsize: Width and height of the figure in inches
+    :param cache_dir: Folder to keep fragments between runs, or None to only keep them in memory
+    :param memory_budget: Memory to allow for the strip of the output being composited (in bytes)
+    :param level: zlib compression level of the output (1 is much faster to write than 6, for previews)
+    :param layout: "spiral" or "arc", see layout_path
+    :param lod: Level of detail ("thumbnail", "draft" or "print"), or None to pick it from dpi and figsize
+    """
+
+    def __init__(self, dpi=300, figsize=(72, 72), cache_dir=".timeline_cache", colors=None,
+                 memory_budget=256 * 1024 * 1024, level=6, layout="spiral", lod=None):
+        use_agg()
+        self.dpi = dpi
+        self.figsize = figsize
+        self.cache_dir = cache_dir
+        self.colors = colors or activity_colors
+        self.memory_budget = memory_budget
+        self.level = level
+        self.layout = layout
+        self.lod = lod or pick_lod(dpi, figsize)
+        self.fragments = {}
+        self.figure = ReusableFigure(figsize)
+        self.used = set()  # Keys of every fragment a render has used, see prune
+        self.drawn = 0
+        self.reused = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # Function to list the parts of the timeline as (key, draw function, data box, stage) in drawing order
+    def sources(self, df, x, y, seed):
+        common = (cache_version, self.dpi, list(self.figsize), self.lod, icons_signature())
+        sources = [(fingerprint("wand", common, x[0], y[0]), lambda ax, stars, stamps: draw_wand(ax, x[0], y[0]),
+                    (x[0] - 10, x[0] + 20, y[0] - 25, y[0] + 25), 0)]
+
+        left, right, below, above = activity_margin
+        colors = sorted(self.colors.items())
+        activities = Activities(df, first_burst)
+        # Every row as text in one go, for the fingerprints
+        rows = df.astype(str).to_numpy().tolist()
+        for index in activities.drawn:
+            key = fingerprint("activity", common, colors, int(index), x[index], y[index], rows[index])
+
+            def draw(ax, stars, stamps, index=index):
+                draw_activity(ax, activities, x[index], y[index], index, self.colors, stars, stamps)
+
+            sources.append((key, draw, (x[index] - left, x[index] + right, y[index] - below, y[index] + above), 1))
+
+        key = fingerprint("sparkle", common, seed, x.tolist(), y.tolist())
+
+        def draw_sparkles(ax, stars, stamps):
+            # Same generator as a full render with this seed, the sparkle trail is the only thing that draws from it
+            draw_sparkle_trail(ax, x, y, density=detail("sparkle_density"), jitter=0.3, max_size=15,
+                               rng=np.random.default_rng(seed))
+
+        sources.append((key, draw_sparkles, (x.min() - sparkle_margin, x.max() + sparkle_margin,
+                                             y.min() - sparkle_margin, y.max() + sparkle_margin), 2))
+        return sources
+
+    # Function to get the pixel box (left, top, right, bottom) of a data box at the output resolution
+    def pixel_box(self, fig, ax, box):
+        x0, x1, y0, y1 = box
+        corners = ax.transData.transform([(x0, y0), (x1, y1)]) / fig.dpi * self.dpi
+        width = int(round(self.figsize[0] * self.dpi))
+        height = int(round(self.figsize[1] * self.dpi))
+        left = int(np.clip(np.floor(corners[:, 0].min()), 0, width))
+        right = int(np.clip(np.ceil(corners[:, 0].max()), 0, width))
+        top = int(np.clip(height - np.ceil(corners[:, 1].max()), 0, height))
+        bottom = int(np.clip(height - np.floor(corners[:, 1].min()), 0, height))
+        return left, top, right, bottom, height
+
+    # Function to draw one part of the timeline on its own and render each of its zorders as a cropped layer
+    def draw_fragment(self, key, draw, box):
+        from matplotlib.text import Text
+        from stamps import StampBatch
+
+        fig, ax = setup_axes(self.figsize, self.figure.take(self.figsize))
+        before = set(ax.get_children())
+        stars = StarBatch(ax)
+        stamps = StampBatch(ax)
+        draw(ax, stars, stamps)
+        stars.flush()
+
+        batched = set(stars.collections.values()) | set(stamps.stamps.values())
+        artists = [artist for artist in ax.get_children() if artist not in before]
+        # Same as the tiled writer: matplotlib would wrap text at the edge of the layer instead of the figure
+        for text in fig.findobj(Text):
+            text.set_wrap(False)
+
+        left, top, right, bottom, height = self.pixel_box(fig, ax, box)
+        layers = []
+        groups = sorted({(artist.get_zorder(), "batch" if artist in batched else "own") for artist in artists})
+        for zorder, kind in groups:
+            if right <= left or bottom <= top:
+                break
+            for artist in artists:
+                artist.set_visible(artist.get_zorder() == zorder and (artist in batched) == (kind == "batch"))
+            tile = render_tile(fig, self.dpi, height, left, top, right, bottom, transparent=True)
+
+            # Keep only the part of the layer that has something drawn on it
+            rows = np.flatnonzero(tile[:, :, 3].any(axis=1))
+            if rows.size == 0:
+                continue
+            cols = np.flatnonzero(tile[:, :, 3].any(axis=0))
+            crop = tile[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+            # Tall layers (the sparkle trail spans the whole spiral) are kept as bands, so no single image gets huge
+            for band in range(0, len(crop), band_rows):
+                image = Image.fromarray(crop[band:band + band_rows].copy(), "RGBA")
+                layers.append((zorder, kind, left + int(cols[0]), top + int(rows[0]) + band, image))
+
+        self.figure.clear()
+        return Fragment(key, layers)
+
+    # Function to get a fragment from memory, then disk, and only draw it if neither has it
+    def fragment(self, key, draw, box):
+        fragment = self.fragments.get(key)
+        if fragment is None and self.cache_dir is not None:
+            fragment = Fragment.load(self.cache_dir, key)
+        if fragment is None:
+            with stage("fragment draw"):
+                fragment = self.draw_fragment(key, draw, box)
+            if self.cache_dir is not None:
+                fragment.save(self.cache_dir)
+            self.drawn += 1
+        else:
+            self.reused += 1
+        self.fragments[key] = fragment
+        return fragment
+
+    # Function to draw the timeline, reusing every fragment whose inputs haven't changed
+    def render(self, df, output_path="timeline_visualization.png", seed=0):
+        """
+        :param df: Activity log for one day (e.g. from load_days)
+        :param output_path: Path of the PNG file to write (only PNG, the layers are composited as pixels)
+        :param seed: Seed for the sparkle trail (fixed, so the trail can be cached too)
+        :return: (fragments drawn, fragments reused)
+        """
+        if not output_path.lower().endswith(".png"):
+            raise ValueError(f"Incremental renders are composited into a PNG, not {output_path}")
+        drawn, reused = self.drawn, self.reused
+        df = df.reset_index(drop=True)
+        with stage("layout"):
+            x, y = layout_path(len(df), self.layout)
+
+        layers = []
+        keys = set()
+        with level_of_detail(self.lod):
+            for rank, (key, draw, box, step) in enumerate(self.sources(df, x, y, seed)):
+                keys.add(key)
+                for zorder, kind, left, top, image in self.fragment(key, draw, box).layers:
+                    layers.append(((zorder, step, kind == "own", rank), left, top, image))
+
+        # Forget fragments that are no longer part of the timeline (they stay on disk until prune)
+        for key in set(self.fragments) - keys:
+            del self.fragments[key]
+        self.used |= keys
+
+        with stage("composite"):
+            width = int(round(self.figsize[0] * self.dpi))
+            height = int(round(self.figsize[1] * self.dpi))
+            layers.sort(key=lambda layer: layer[0])
+            write_png(output_path, width, height, self.dpi, self.strips(layers, width, height), level=self.level)
+        return self.drawn - drawn, self.reused - reused
+
+    # Function to alpha-composite the layers one full width strip at a time, so the whole canvas is never in memory
+    def strips(self, layers, width, height):
+        rows = strip_height(width, self.memory_budget)
+        for top in range(0, height, rows):
+            bottom = min(top + rows, height)
+            strip = Image.new("RGBA", (width, bottom - top), (0, 0, 0, 0))
+            for _, left, layer_top, image in layers:
+                # Only the rows of the layer that fall inside this strip
+                first = max(top, layer_top)
+                last = min(bottom, layer_top + image.height)
+                if first < last:
+                    strip.alpha_composite(image, dest=(left, first - top), source=(0, first - layer_top, image.width,
+                                                                                   last - layer_top))
+            yield np.asarray(strip)
+
+    # Function to delete the fragment files in the cache folder that no render has used for max_age seconds
+    def prune(self, max_age=fragment_max_age):
+        """
+        Every edit leaves the fragments of the old rows behind, so without this the cache only grows.
+        Fragments of days that weren't drawn in this run are kept as long as they were used recently,
+        so switching between days doesn't throw their cache away. max_age=0 deletes every fragment
+        this renderer didn't use.
+
+        :return: Number of files deleted
+        """
+        if self.cache_dir is None:
+            return 0
+        now = time.time()
+        files = []
+        last_used = {}  # key -> modified time of its index, see Fragment.load
+        for entry in os.scandir(self.cache_dir):
+            # Fragment files are "<sha1>.json" or "<sha1>_<layer>.png", anything else isn't ours to delete
+            key = entry.name.split(".")[0].split("_")[0]
+            if len(key) == 40 and entry.name.endswith((".json", ".png")):
+                files.append((key, entry))
+                if entry.name.endswith(".json"):
+                    last_used[key] = entry.stat().st_mtime
+
+        deleted = 0
+        for key, entry in files:
+            # Layers go with their index, a layer left without one goes by its own age
+            if key not in self.used and now - last_used.get(key, entry.stat().st_mtime) >= max_age:
+                os.remove(entry.path)
+                deleted += 1
+        return deleted
+
+    # Function to free the figure once no more renders are coming
+    def release(self):
+        self.figure.release()
+        self.fragments.clear()
+
+
+# Function to draw every day in the frame incrementally, one output per day
+def render_incremental(df, output_pattern="timeline_{day}.png", seed=0, cache_dir=".timeline_cache", dpi=300,
+                       renderer=None):
+    renderer = renderer or IncrementalRenderer(dpi=dpi, cache_dir=cache_dir)
+    outputs = {}
+    for day, day_df in df.groupby('Day', observed=True, sort=False):
+        output_path = output_pattern.format(day=day_slug(day))
+        drawn, reused = renderer.render(day_df, output_path, seed=seed)
+        outputs[day] = output_path
+        print(f"{day} saved to {output_path} ({drawn} fragments drawn, {reused} reused)")
+    deleted = renderer.prune()
+    if deleted:
+        print(f"Deleted {deleted} fragment files unused for {fragment_max_age // (24 * 60 * 60)} days from "
+              f"{renderer.cache_dir}")
+    return outputs
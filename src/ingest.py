@@ -0,0 +1,98 @@
+#python module to read the activity log csv in chunks, keeping only the days we want to draw
+import pandas as pd
+
+# Column types of 24hour.csv (the times are parsed separately with time_format)
+csv_dtypes = {
+    "Day": "category",
+    "Activity Type": "category",
+    "Activity Description": "string",
+    "Who Im with": "category",
+    "Energy Level": "string",  # Checked against energy_level, then made categorical
+    "Start time": "string",
+    "end time": "string",
+    "total time": "string",
+}
+
+energy_level = pd.CategoricalDtype(["low", "medium", "high"], ordered=True)
+
+# The csv has a lower case 'end time' column, rename it to match 'Start time'
+column_names = {"end time": "End time"}
+
+time_format = '%m/%d/%Y %I:%M:%S%p'
+time_columns = ["Start time", "End time"]
+category_columns = ["Day", "Activity Type", "Who Im with"]
+
+
+# Function to turn the 'Energy Level' column into energy_level, refusing any value that isn't one of its levels
+def parse_energy_levels(column):
+    """
+    Reading it straight as a categorical would quietly turn a misspelt level into NaN, so the raw
+    strings are checked first. Case and surrounding spaces don't matter ("High " is "high").
+
+    :param column: 'Energy Level' as read from the csv, indexed by data row (0 is the first row after the header)
+    """
+    levels = column.str.strip().str.lower()
+    bad = levels.isna() | ~levels.isin(energy_level.categories)
+    if bad.any():
+        row = bad.idxmax()
+        value = "an empty value" if pd.isna(column[row]) else repr(column[row])
+        raise ValueError(f"Unknown energy level {value} on line {row + 2} of the csv "
+                         f"(expected one of {', '.join(energy_level.categories)})")
+    return levels.astype(energy_level)
+
+
+# Function to read the csv chunk by chunk and yield only the rows for the requested days
+def iter_day_chunks(path, days=None, chunksize=100_000):
+    """
+    :param path: Path to the activity log csv
+    :param days: Days to keep (e.g. ['Day 1']), or None to keep every day
+    :param chunksize: Number of csv rows parsed at a time, which bounds the memory used
+    :return: Generator of DataFrames with typed columns
+    """
+    days = None if days is None else set(days)
+
+    for chunk in pd.read_csv(path, dtype=csv_dtypes, chunksize=chunksize):
+        if days is not None:
+            chunk = chunk[chunk["Day"].isin(days)]
+        if chunk.empty:
+            continue
+
+        chunk = chunk.rename(columns=column_names)
+        chunk["Energy Level"] = parse_energy_levels(chunk["Energy Level"])
+        # Only parse the timestamps of the rows we are keeping
+        for column in time_columns:
+            chunk[column] = pd.to_datetime(chunk[column], format=time_format, errors='coerce')
+        yield chunk
+
+
+# Function to list the days in the log, in the order they first appear
+def available_days(path, chunksize=100_000):
+    days = {}
+    for chunk in pd.read_csv(path, usecols=["Day"], dtype={"Day": "string"}, chunksize=chunksize):
+        days.update(dict.fromkeys(chunk["Day"].dropna()))
+    return list(days)
+
+
+# Function to load the requested days into one DataFrame
+def load_days(path, days=None, chunksize=100_000):
+    """
+    Loads the rows for the requested days, numbered from 0 so the index lines up with the spiral points.
+
+    :param path: Path to the activity log csv
+    :param days: Days to keep (e.g. ['Day 1']), or None to keep every day
+    :param chunksize: Number of csv rows parsed at a time
+    """
+    chunks = list(iter_day_chunks(path, days, chunksize))
+    if not chunks:
+        empty = pd.read_csv(path, dtype=csv_dtypes, nrows=0).rename(columns=column_names)
+        for column in time_columns:
+            empty[column] = pd.to_datetime(empty[column], format=time_format)
+        empty["Energy Level"] = empty["Energy Level"].astype(energy_level)
+        return empty
+
+    df = pd.concat(chunks, ignore_index=True)
+
+    # Chunks can see different categories, which pandas turns back into plain objects when concatenating
+    for column in category_columns:
+        df[column] = df[column].astype("category")
+    return df
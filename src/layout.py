@@ -0,0 +1,164 @@
+#python module to lay activities out at equal arc length along the spiral, nudging any that overlap
+import math
+
+import numpy as np
+
+
+# Function to sample the timeline spiral densely (same curve as generate_spiral_path, not yet centered)
+def spiral_curve(num_samples, radius=50, turns=3, power=1.1):
+    t = np.linspace(0, 1, num_samples)
+    theta = t * turns * 2 * np.pi
+    r = (t * radius) ** power
+    return r * np.cos(theta), r * np.sin(theta)
+
+
+# Function to place points at equal arc length along the spiral
+def arc_length_positions(num_points, radius=50, turns=3, power=1.1, first=0, samples_per_point=16, min_samples=4096):
+    """
+    :param num_points: Number of points to place
+    :param radius: Radius of the spiral before the power is applied (as in generate_spiral_path)
+    :param first: Index of the first point that is drawn, the points before it (only part of the trail)
+                  share the first gap, so the drawn ones get the rest of the spiral
+    :param samples_per_point: Density of the sampled curve the arc length is measured on
+    :return: x, y arrays centered the same way as generate_spiral_path, and the spiral center
+    """
+    x, y = spiral_curve(max(num_points * samples_per_point, min_samples), radius, turns, power)
+
+    # Cumulative arc length of the sampled curve, then read off the curve at equal steps of it
+    arc = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    first = min(first, num_points)
+    drawn = num_points - first
+    gap = arc[-1] / max(drawn, 1)
+    steps = np.concatenate((np.linspace(0, gap, first, endpoint=False),
+                            np.linspace(arc[-1] - gap * (drawn - 1), arc[-1], drawn)))
+    px, py = np.interp(steps, arc, x), np.interp(steps, arc, y)
+
+    # Re-centering the spiral the same way generate_spiral_path does, so it sits in the same spot on the page
+    shift_x, shift_y = -x.min() - 40, -y.min() - 30
+    return px + shift_x, py + shift_y, (shift_x, shift_y)
+
+
+# What draw_activity draws around an activity's spot (x, y), as boxes (left, right, bottom, top) relative to it
+footprint = (
+    (-13, 11, -14, 8),  # Halo ring (radius 10 plus half a mini star), shifted left when a row has two types
+    (-12, 12, -16, 8),  # Description burst star with its label, and the activity icons
+    (-9, 9, -24, -6),  # Start time burst star with its label
+    (-10, 2, -3, 10),  # Silver energy star and blue companion star
+)
+
+
+# Function to scale footprint boxes, and get the size of the smallest box around all of them
+def scaled_footprint(boxes, scale=1.0):
+    boxes = [tuple(edge * scale for edge in box) for box in boxes]
+    width = max(box[1] for box in boxes) - min(box[0] for box in boxes)
+    height = max(box[3] for box in boxes) - min(box[2] for box in boxes)
+    return boxes, max(width, height)
+
+
+# Function to check whether the footprints of two activities at (x, y) and (other_x, other_y) overlap
+def footprints_overlap(x, y, other_x, other_y, boxes):
+    for left, right, bottom, top in boxes:
+        for other_left, other_right, other_bottom, other_top in boxes:
+            if (x + left < other_x + other_right and other_x + other_left < x + right
+                    and y + bottom < other_y + other_top and other_y + other_bottom < y + top):
+                return True
+    return False
+
+
+# Uniform grid of cells as wide as a whole footprint, so an overlap can only be in the 3x3 cells around a point
+class SpatialGrid:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def insert(self, x, y):
+        self.cells.setdefault(self.cell(x, y), []).append((x, y))
+
+    # Function to check whether the footprint at (x, y) overlaps the footprint of any point already in the grid
+    def collides(self, x, y, boxes):
+        cell_x, cell_y = self.cell(x, y)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other_x, other_y in self.cells.get((cell_x + dx, cell_y + dy), ()):
+                    if footprints_overlap(x, y, other_x, other_y, boxes):
+                        return True
+        return False
+
+
+# Function to nudge points whose footprint overlaps an earlier one away from the spiral center, checked against a spatial grid
+def avoid_collisions(x, y, center, first=0, boxes=footprint, scale=1.0, max_nudges=8):
+    """
+    :param x, y: Positions of the activities, in drawing order
+    :param center: Center of the spiral, points are nudged along the line away from it
+    :param first: Index of the first point that is drawn (earlier points are only part of the trail)
+    :param boxes: Boxes around each point that must not overlap another point's boxes (see footprint)
+    :param scale: Scale of the boxes, below 1 when there are more activities than fit at full size
+    :param max_nudges: Nudges to try on each side before leaving a point where it was
+    :return: x, y with nudged points moved, and the number of points that were nudged and that still overlap
+    """
+    # One pass over the points with a constant number of grid lookups each, plus the O(n) arc length sampling,
+    # so the whole layout is linear in the number of activities
+    x, y = np.array(x, dtype=float), np.array(y, dtype=float)
+    boxes, size = scaled_footprint(boxes, scale)
+    grid = SpatialGrid(size)
+    step = size / 8
+    nudged = unresolved = 0
+
+    for index in range(first, len(x)):
+        # Outward direction from the spiral center (any direction for a point right on the center)
+        dx, dy = x[index] - center[0], y[index] - center[1]
+        length = math.hypot(dx, dy) or 1.0
+        dx, dy = dx / length, dy / length
+
+        for attempt in range(2 * max_nudges + 1):
+            # 0, +1, -1, +2, -2 ... steps outward
+            amount = (attempt + 1) // 2 * step * (1 if attempt % 2 else -1)
+            cx = x[index] + dx * amount
+            cy = y[index] + dy * amount
+            if not grid.collides(cx, cy, boxes):
+                break
+        else:
+            # No room nearby: leave it on the spiral and keep it out of the grid, so every cell only ever
+            # holds points whose footprints don't overlap (a handful at most) and each check stays O(1)
+            unresolved += 1
+            continue
+
+        if amount:
+            x[index] += dx * amount
+            y[index] += dy * amount
+            nudged += 1
+        grid.insert(cx, cy)
+
+    return x, y, nudged, unresolved
+
+
+# Function to lay the timeline out at equal arc length, with overlapping activities nudged apart
+def arc_spiral_path(num_points, radius=50, first=0, boxes=footprint, report=None):
+    """
+    Drop-in replacement for generate_spiral_path: same spiral and page position, but the points are
+    spread evenly along the curve instead of crowding in the middle.
+
+    With many activities the spiral gets more turns, so the gap between turns keeps up with the
+    spacing along it, and the footprint boxes shrink to that spacing, so the activities are still
+    spread out evenly when there are more than fit on the page at full size.
+
+    :param boxes: Boxes around each activity that must not overlap another's (see footprint)
+    :param report: Dict to fill with the turns and footprint scale used and the number of nudged and
+                   still overlapping activities, or None
+    """
+    # About sqrt(n / pi) turns makes the spacing along the spiral match the gap between its turns
+    drawn = max(num_points - first, 0)
+    turns = max(3, math.sqrt(drawn / math.pi))
+    x, y, center = arc_length_positions(num_points, radius, turns, first=first)
+
+    size = scaled_footprint(boxes)[1]
+    spacing = float(np.hypot(np.diff(x[first:]), np.diff(y[first:])).mean()) if drawn > 1 else size
+    scale = min(1.0, 0.9 * spacing / size)  # Chords are a little shorter than the arc between them
+
+    x, y, nudged, unresolved = avoid_collisions(x, y, center, first=first, boxes=boxes, scale=scale)
+    if report is not None:
+        report.update(turns=turns, scale=scale, nudged=nudged, unresolved=unresolved)
+    return x, y
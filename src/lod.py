@@ -0,0 +1,65 @@
+#python module to scale the expensive details of the timeline to the size it is drawn at
+from contextlib import contextmanager
+
+# Level of detail profiles, from the smallest output up
+# max_pixels: longest side of the output (dpi x figure size in inches) the profile is picked for, None for any size
+# mini_stars: mini stars around each halo, mini_star_pixels: resolution of each of them
+# sparkle_density: sparkles per data unit along the trail, wand_pixels: size the wand image is resized to
+# icon_pixels: longest side the icons are scaled down to before drawing (None keeps the originals)
+# text: whether to draw the descriptions and start times (they can't be read in a thumbnail anyway)
+profiles = {
+    "thumbnail": {"max_pixels": 2560, "mini_stars": 40, "mini_star_pixels": 16, "sparkle_density": 1.2, "wand_pixels": 64,
+                  "icon_pixels": 64, "text": False},
+    "draft": {"max_pixels": 8192, "mini_stars": 75, "mini_star_pixels": 30, "sparkle_density": 3.2, "wand_pixels": 200,
+              "icon_pixels": 256, "text": True},
+    "print": {"max_pixels": None, "mini_stars": 150, "mini_star_pixels": 60, "sparkle_density": 8, "wand_pixels": 500,
+              "icon_pixels": None, "text": True},
+}
+
+# The profile being drawn with (full detail unless a render picked another one)
+active_lod = profiles["print"]
+
+
+# Function to pick the profile for an output of this size (a 72 inch figure: thumbnail up to 35 dpi, draft up to 113)
+def pick_lod(dpi, figsize=(72, 72)):
+    pixels = dpi * max(figsize)
+    for name, profile in profiles.items():
+        if profile["max_pixels"] is None or pixels <= profile["max_pixels"]:
+            return name
+    return "print"
+
+
+# Function to draw with a profile until the with block ends
+@contextmanager
+def level_of_detail(name=None, dpi=300, figsize=(72, 72)):
+    """
+    :param name: Key in profiles, or None to pick one from dpi and figsize
+    """
+    global active_lod
+    previous = active_lod
+    active_lod = profiles[name or pick_lod(dpi, figsize)]
+    try:
+        yield active_lod
+    finally:
+        active_lod = previous
+
+
+# Function to look up one setting of the active profile
+def detail(key):
+    return active_lod[key]
+
+
+# Function to get an icon no bigger than the active profile needs, and how much it was shrunk
+# (things drawn at a zoom, like the stamps, divide their zoom by it to keep the same size on the page)
+def lod_icon(path, scale=1.0):
+    from assets import icon_cache
+
+    limit = active_lod["icon_pixels"]
+    if limit is not None:
+        original = icon_cache.get(path)
+        fit = limit / (max(original.size) * scale)
+        if fit < 1:
+            # Rounded so every render asks the icon cache for the same key
+            shrunk = round(scale * fit, 4)
+            return icon_cache.get(path, shrunk), shrunk / scale
+    return icon_cache.get(path, scale), 1.0
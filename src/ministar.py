@@ -1,49 +1,90 @@
+#python script to save the mini star swirl legends for each activity type
+import argparse
+import json
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from PIL import Image, ImageDraw
+from PIL import Image
+
+from sprites import mini_star_sprite
 
 # Function to create a single mini star with a circular gradient
+# The sprite is built with numpy and cached, so each color is only drawn once
 def create_mini_star(color, circle_size=40, line_width=4):
-    img = Image.new('RGBA', (circle_size, circle_size), (255, 255, 255, 0))
-    draw = ImageDraw.Draw(img)
-
-    # Create a gradient effect inside the circle
-    gradient = Image.new('RGBA', (circle_size, circle_size), (0, 0, 0, 0))
-    gradient_draw = ImageDraw.Draw(gradient)
-
-    # Draw a radial gradient (simulating a metallic shine effect)
-    for i in range(circle_size // 2, 0, -1):
-        shade = tuple(int(c * (i / (circle_size // 2))) for c in color)  # Apply gradient effect
-        gradient_draw.ellipse([i, i, circle_size - i, circle_size - i], outline=shade, width=line_width)
-
-    # Apply the gradient to the circle
-    img.paste(gradient, (0, 0), gradient)
-
-    # Draw a centered star inside the circle
-    points = [
-        (circle_size * 0.5, circle_size * 0.1), (circle_size * 0.6, circle_size * 0.35),
-        (circle_size * 0.9, circle_size * 0.35), (circle_size * 0.65, circle_size * 0.55),
-        (circle_size * 0.75, circle_size * 0.85), (circle_size * 0.5, circle_size * 0.7),
-        (circle_size * 0.25, circle_size * 0.85), (circle_size * 0.35, circle_size * 0.55),
-        (circle_size * 0.1, circle_size * 0.35), (circle_size * 0.4, circle_size * 0.35)
-    ]
-    draw.polygon(points, fill=color)
+    return mini_star_sprite(color, circle_size=circle_size, line_width=line_width, tail_length=0, shape="centered")
+
+# Swirl layouts that have already been worked out, keyed by (num_mini_stars, radius, circle_size, star alpha)
+swirl_layouts = {}
+
+
+# Function to work out, for every pixel of a swirl, which mini star ends up on top there and which of its pixels it shows
+def swirl_layout(num_mini_stars, radius, circle_size, alpha):
+    """
+    Pasting the mini stars one after another with their own alpha as the mask copies each opaque pixel
+    over whatever was there, so every pixel shows the last star covering it. That only depends on the
+    star's shape, not its color, so it is worked out once and every color is then a single lookup.
+
+    :param alpha: Alpha channel of the mini star (only 0 and 255, as mini_star_sprite builds it)
+    :return: Image size, the rows and columns of the covered pixels, and the row and column inside the mini star
+             each of them is copied from
+    """
+    key = (num_mini_stars, radius, circle_size, alpha.tobytes())
+    if key in swirl_layouts:
+        return swirl_layouts[key]
+
+    size = radius * 2 + circle_size
+    center = size // 2
+    angle_steps = np.linspace(0, 2 * np.pi, num_mini_stars, endpoint=False)  # Full circle
+    # Same spots as the old paste loop, int() rounds towards zero like astype(int)
+    left = (center + radius * np.cos(angle_steps) - circle_size // 2).astype(int)
+    top = (center + radius * np.sin(angle_steps) - circle_size // 2).astype(int)
+
+    # Every opaque pixel of every star on the swirl, in paste order
+    star_rows, star_cols = np.nonzero(alpha == 255)
+    rows = (top[:, None] + star_rows).ravel()
+    cols = (left[:, None] + star_cols).ravel()
+    order = np.repeat(np.arange(num_mini_stars), len(star_rows))
+    inside = (rows >= 0) & (rows < size) & (cols >= 0) & (cols < size)
+
+    # The last star pasted over a pixel is the one left on top
+    owner = np.full((size, size), -1)
+    np.maximum.at(owner, (rows[inside], cols[inside]), order[inside])
+    covered_rows, covered_cols = np.nonzero(owner >= 0)
+    star = owner[covered_rows, covered_cols]
+    layout = ((size, size), covered_rows, covered_cols, covered_rows - top[star], covered_cols - left[star])
+    swirl_layouts[key] = layout
+    return layout
 
-    return img
 
 # Function to arrange condensed mini stars in a circular formation
 def create_condensed_mini_star_swirl(color, num_mini_stars=180, radius=50, circle_size=15):
+    # The mini star is the same for the whole swirl, so it is only fetched once
+    mini_star = create_mini_star(color, circle_size)
+    star_pixels = np.asarray(mini_star)
+    if not np.isin(star_pixels[:, :, 3], (0, 255)).all():
+        return paste_swirl(mini_star, num_mini_stars, radius, circle_size)
+
+    # All 180 copies placed in one pass, on the same transparent white background the paste loop used
+    img_size, rows, cols, star_rows, star_cols = swirl_layout(num_mini_stars, radius, circle_size, star_pixels[:, :, 3])
+    pixels = np.zeros(img_size + (4,), dtype=np.uint8)
+    pixels[:, :, :3] = 255
+    pixels[rows, cols] = star_pixels[star_rows, star_cols]
+    return Image.fromarray(pixels, 'RGBA')
+
+
+# Function to paste the mini stars one at a time (for stars with soft edges, which blend into each other)
+def paste_swirl(mini_star, num_mini_stars, radius, circle_size):
     img_size = (radius * 2 + circle_size, radius * 2 + circle_size)
     img = Image.new('RGBA', img_size, (255, 255, 255, 0))
-    
+
     angle_steps = np.linspace(0, 2 * np.pi, num_mini_stars, endpoint=False)  # Full circle
     center = (img_size[0] // 2, img_size[1] // 2)
 
     for angle in angle_steps:
         x = int(center[0] + radius * np.cos(angle) - circle_size // 2)
         y = int(center[1] + radius * np.sin(angle) - circle_size // 2)
-        
-        mini_star = create_mini_star(color, circle_size)
         img.paste(mini_star, (x, y), mini_star)
 
     return img
@@ -58,15 +99,81 @@ activity_colors = {
     "clifton hill": (255, 140, 0)   # Strong Orange
 }
 
-# Create output directory if not exists
-output_dir = "legend_mini_star_swirls"
-os.makedirs(output_dir, exist_ok=True)
-
-# Generate and save condensed circular star swirls for each activity type
-for activity, color in activity_colors.items():
+# Function to build (and save) the swirl of one activity, run for every activity at once by save_legends
+def save_legend(output_dir, activity, color):
     swirl_img = create_condensed_mini_star_swirl(color, num_mini_stars=180, radius=50, circle_size=12)
 
     # Save the image as PNG with a transparent background
     swirl_img.save(os.path.join(output_dir, f"{activity}_mini_star_swirl.png"), "PNG")
+    return swirl_img
+
+
+# Function to generate and save a condensed circular star swirl for each activity type
+def save_legends(output_dir="legend_mini_star_swirls", colors=None, workers=None, sheet=None):
+    """
+    :param output_dir: Folder to save one PNG per activity in
+    :param colors: Dict of activity -> RGB color (defaults to activity_colors)
+    :param workers: Number of threads building and saving the legends (defaults to what ThreadPoolExecutor picks)
+    :param sheet: Path to also save every legend side by side as one sprite sheet, or None
+    :return: Dict of activity -> swirl image
+    """
+    # Create output directory if not exists
+    os.makedirs(output_dir, exist_ok=True)
+    colors = colors or activity_colors
+
+    # Each legend takes about a millisecond, so threads rather than worker processes (PNG encoding releases the GIL)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        swirls = list(pool.map(lambda item: save_legend(output_dir, *item), colors.items()))
+    swirls = dict(zip(colors, swirls))
+
+    if sheet is not None:
+        save_sprite_sheet(swirls, sheet)
+
+    print("Condensed mini star swirl legends saved successfully!")
+    return swirls
+
+
+# Function to save all legends as one image, in a grid, with a JSON file giving where each one is
+def save_sprite_sheet(swirls, output_path, columns=None):
+    """
+    :param swirls: Dict of activity -> swirl image (e.g. from save_legends)
+    :param output_path: PNG to write, the index is saved next to it with a .json extension
+    :param columns: Number of legends per row (defaults to a square-ish grid)
+    :return: Dict of activity -> {"left", "top", "width", "height"} in pixels
+    """
+    columns = columns or math.ceil(math.sqrt(len(swirls)))
+    rows = math.ceil(len(swirls) / columns)
+    cell_width = max(swirl.width for swirl in swirls.values())
+    cell_height = max(swirl.height for swirl in swirls.values())
+
+    sheet = Image.new('RGBA', (columns * cell_width, rows * cell_height), (255, 255, 255, 0))
+    index = {}
+    for number, (activity, swirl) in enumerate(swirls.items()):
+        left, top = number % columns * cell_width, number // columns * cell_height
+        sheet.paste(swirl, (left, top))
+        index[activity] = {"left": left, "top": top, "width": swirl.width, "height": swirl.height}
+
+    sheet.save(output_path, "PNG")
+    with open(os.path.splitext(output_path)[0] + ".json", "w") as file:
+        json.dump(index, file, indent=2)
+    return index
+
+
+# Function to run the script from the command line (also used by "python src legends")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Save a mini star swirl legend for each activity type")
+    parser.add_argument("--output-dir", default="legend_mini_star_swirls", help="Folder to save the legends in")
+    parser.add_argument("--workers", type=int, default=None, help="Number of threads building the legends")
+    parser.add_argument("--sheet", nargs="?", const="", default=None, metavar="PNG",
+                        help="Also save every legend in one sprite sheet (default: legend_sheet.png in the output "
+                             "folder), with a JSON file of where each one is")
+    args = parser.parse_args(argv)
+
+    sheet = args.sheet
+    if sheet == "":
+        sheet = os.path.join(args.output_dir, "legend_sheet.png")
+    save_legends(args.output_dir, workers=args.workers, sheet=sheet)
+
 
-print("Condensed mini star swirl legends saved successfully!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#python module to save a figure as a PDF where each distinct image is only embedded once
+import hashlib
+import inspect
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+# Resolution the images are embedded at (sources bigger than this at their size on the page are scaled down)
+image_dpi = 300
+
+
+# Function to hash an image's pixels, so identical images drawn by different artists get the same key
+def image_key(pixels):
+    pixels = np.ascontiguousarray(pixels)
+    return hashlib.sha1(pixels.tobytes() + str((pixels.shape, pixels.dtype.str)).encode()).digest()
+
+
+# Function to get the PdfFile a PdfPages writes to, or None if this matplotlib's PDF writer isn't the one
+# shared_image_objects was written for (it relies on PdfPages._ensure_file and PdfFile.imageObject(image))
+def image_writer(pages):
+    from matplotlib.backends.backend_pdf import PdfFile
+
+    ensure_file = getattr(pages, "_ensure_file", None)
+    image_object = getattr(PdfFile, "imageObject", None)
+    if ensure_file is None or image_object is None:
+        return None
+    if list(inspect.signature(image_object).parameters) != ["self", "image"]:
+        return None
+    return ensure_file()
+
+
+# Function to make one PDF file embed each distinct image once (it normally keys them by array id)
+@contextmanager
+def shared_image_objects(file):
+    """
+    While active, the file's imageObject looks images up by a hash of their pixels, so the same
+    halo or icon drawn at many spots becomes one image XObject that every placement refers to.
+    Only this file is patched, other PDFs saved at the same time embed their images as usual.
+
+    Yields a dict counting the images placed and the distinct ones embedded.
+    """
+    original = file.imageObject
+    counts = {"images": 0, "embedded": 0}
+    names = {}  # image hash -> name of its XObject
+
+    def image_object(image):
+        key = image_key(image)
+        counts["images"] += 1
+        if key not in names:
+            names[key] = original(image)
+            counts["embedded"] += 1
+        return names[key]
+
+    file.imageObject = image_object
+    try:
+        yield counts
+    finally:
+        del file.imageObject
+
+
+# Function to get the size (in pixels at the given dpi) an image is drawn at on the page
+def page_size(image, dpi):
+    left, right, bottom, top = image.get_extent()
+    corners = image.get_transform().transform([(left, bottom), (right, top)])
+    width, height = np.abs(corners[1] - corners[0]) / image.figure.dpi * dpi
+    return max(int(np.ceil(width)), 1), max(int(np.ceil(height)), 1)
+
+
+# Function to scale every imshow source much bigger than its size on the page down to that size, until the with block ends
+@contextmanager
+def page_sized_images(fig, dpi=image_dpi):
+    """
+    Sources much bigger than needed (the icons are thousands of pixels wide) are scaled down to dpi
+    at their size on the page, once per distinct source and size, so matplotlib doesn't resample the
+    full source every time the figure is drawn. The figure is put back afterwards.
+
+    Yields the number of bytes the scaled down images take.
+    """
+    from matplotlib.image import AxesImage
+
+    resized = {}  # (source hash, size) -> scaled down pixels
+    changed = []
+    for image in fig.findobj(AxesImage):
+        pixels = np.asarray(image.get_array())
+        size = page_size(image, dpi)
+        if pixels.dtype == np.uint8 and pixels.ndim == 3 and pixels.shape[1] > size[0] and pixels.shape[0] > size[1]:
+            key = (image_key(pixels), size)
+            if key not in resized:
+                resized[key] = np.asarray(Image.fromarray(pixels).resize(size, Image.Resampling.LANCZOS))
+            changed.append((image, image.get_array()))
+            image.set_data(resized[key])
+    try:
+        yield sum(pixels.nbytes for pixels in resized.values())
+    finally:
+        for image, pixels in changed:
+            image.set_data(pixels)
+
+
+# Function to hand every imshow image to the PDF at print resolution and without resampling it per placement
+@contextmanager
+def print_ready_images(fig, dpi=image_dpi):
+    """
+    matplotlib resamples an imshow image for every placement (a little differently at each sub-pixel
+    position), so identical images still come out as different pixels. With interpolation 'none' the
+    PDF gets the source image and scales it itself, so identical sources stay identical. Oversized
+    sources are scaled down first, see page_sized_images. The figure is put back afterwards.
+    """
+    from matplotlib.image import AxesImage
+
+    images = fig.findobj(AxesImage)
+    interpolations = [image.get_interpolation() for image in images]
+    for image in images:
+        image.set_interpolation("none")
+    try:
+        with page_sized_images(fig, dpi):
+            yield
+    finally:
+        for image, interpolation in zip(images, interpolations):
+            image.set_interpolation(interpolation)
+
+
+# Function to save a figure as a PDF with each distinct image embedded once
+def save_pdf(fig, output_path, dpi=image_dpi, transparent=False):
+    """
+    Drop-in for fig.savefig(output_path, format="pdf") for the timeline, where the same halo ring
+    and the same heart or companion icon are drawn for many rows: each distinct image is stored
+    once and every placement refers to it.
+
+    :param dpi: Resolution of the embedded images
+    :param transparent: Leave out the figure background
+    :return: Dict with the number of images placed and of distinct images embedded, or None if this
+             matplotlib's PDF writer can't share them and the figure was saved as usual
+    """
+    import matplotlib
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    # Images next to each other would otherwise be merged into one big image before they get here
+    with matplotlib.rc_context({"image.composite_image": False}), print_ready_images(fig, dpi):
+        with PdfPages(output_path) as pages:
+            file = image_writer(pages)
+            if file is None:
+                fig.savefig(output_path, format="pdf", dpi=dpi, transparent=transparent)
+                return None
+            with shared_image_objects(file) as counts:
+                pages.savefig(fig, dpi=dpi, transparent=transparent)
+    return counts
@@ -0,0 +1,43 @@
+#python module to queue the timeline's draw calls first, so identical ones are only drawn once
+from profiling import stage
+
+
+# Draw commands for one render, with exact repeats dropped before anything reaches matplotlib
+class RenderPlan:
+    """
+    A command is a kind ("energy stars", "halo", ...), the function that draws it and the arguments it
+    is called with after the axis. Two commands of the same kind with the same arguments (position,
+    size, color, icon, text, ...) would draw the same thing on top of each other, so only the first is
+    kept. A row tagged "eating, relaxing" used to get its silver star, hearts, blue star and start time
+    drawn once per tag, now they are drawn once.
+    """
+
+    def __init__(self):
+        self.commands = []
+        self.keys = set()
+        self.dropped = {}
+
+    # Function to queue a command, returning False if an identical one is already queued
+    def add(self, kind, function, *args, activity_type=None):
+        """
+        :param kind: Name of the command, also the profiling stage it is timed as
+        :param function: Called as function(ax, *args) when the plan is drawn
+        :param args: Everything the command draws from, they must be hashable
+        :param activity_type: Activity type to count the command's time under in the profile
+        """
+        key = (kind, function, args)
+        if key in self.keys:
+            self.dropped[kind] = self.dropped.get(kind, 0) + 1
+            return False
+        self.keys.add(key)
+        self.commands.append((kind, function, args, activity_type))
+        return True
+
+    # Function to run every queued command on an axis, in the order they were queued
+    def draw(self, ax):
+        for kind, function, args, activity_type in self.commands:
+            with stage(kind, ax, activity_type):
+                function(ax, *args)
+
+    def stats(self):
+        return {"commands": len(self.commands), "dropped": sum(self.dropped.values()), "dropped_by_kind": dict(self.dropped)}
@@ -0,0 +1,137 @@
+#python module to time the stages of a timeline render (only when profiling is turned on)
+import functools
+import json
+import platform
+import time
+from contextlib import nullcontext
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+# The profile being recorded, or None when profiling is off
+active_profile = None
+
+# Reused for every stage while profiling is off, so a disabled stage costs one function call
+no_op = nullcontext()
+
+
+# Function to get the peak memory of this process in MB (None where it can't be measured)
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return round(peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024, 1)
+
+
+# Function to count the artists on an axis (None if there is no axis to look at)
+def count_artists(ax):
+    return None if ax is None else len(ax.get_children())
+
+
+# Wall time, call count and artists created for every stage of a render
+class RenderProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.activity_types = {}
+        self.notes = {}  # Anything else a render reports, e.g. the render plan's dropped commands
+
+    def record(self, name, seconds, artists, activity_type=None):
+        totals = [self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "artists": 0})]
+        if activity_type is not None:
+            totals.append(self.activity_types.setdefault(activity_type, {"calls": 0, "seconds": 0.0, "artists": 0}))
+        for entry in totals:
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["artists"] += artists or 0
+
+    def report(self):
+        return {
+            "total_s": time.perf_counter() - self.started,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "activity_types": self.activity_types,
+            "notes": self.notes,
+        }
+
+    def summary(self):
+        return format_summary(self.report())
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+# Function to format a profile report as a table for the console, slowest stages first
+def format_summary(report):
+    lines = [f"Render profile: {report['total_s']:.2f}s total, peak memory {report['peak_rss_mb']} MB"]
+    for title, entries in (("stage", report["stages"]), ("activity type", report["activity_types"])):
+        lines.append(f"{title:<24}{'calls':>8}{'seconds':>12}{'artists':>10}")
+        for name, entry in sorted(entries.items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{name:<24}{entry['calls']:>8}{entry['seconds']:>12.3f}{entry['artists']:>10}")
+    for name, value in report.get("notes", {}).items():
+        lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+
+# Times one stage and counts the artists it added to the axis
+class Stage:
+    def __init__(self, profile, name, ax, activity_type):
+        self.profile = profile
+        self.name = name
+        self.ax = ax
+        self.activity_type = activity_type
+
+    def __enter__(self):
+        self.artists = count_artists(self.ax)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        artists = None if self.ax is None else count_artists(self.ax) - self.artists
+        self.profile.record(self.name, seconds, artists, self.activity_type)
+        return False
+
+
+# Function to time a block of code as a stage: with stage("halo", ax, "eating"): ...
+def stage(name, ax=None, activity_type=None):
+    if active_profile is None:
+        return no_op
+    return Stage(active_profile, name, ax, activity_type)
+
+
+# Function to add something to the profile being recorded (nothing happens while profiling is off)
+def note(name, value):
+    if active_profile is not None:
+        active_profile.notes[name] = value
+
+
+# Decorator to time every call to a helper function as a stage
+def profiled(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if active_profile is None:
+                return func(*args, **kwargs)
+            with Stage(active_profile, name, None, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Function to turn profiling on (every stage from now on is recorded into the returned profile)
+def start_profile():
+    global active_profile
+    active_profile = RenderProfile()
+    return active_profile
+
+
+# Function to turn profiling off and get back what was recorded
+def stop_profile():
+    global active_profile
+    profile, active_profile = active_profile, None
+    return profile
@@ -0,0 +1,282 @@
+#python module to draw the timeline straight onto a PIL canvas, without going through matplotlib's renderer
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from lod import lod_icon
+from stars import unit_star
+from tiled import write_png
+
+# Supersampling used for the antialiased edges of burst stars and sparkles
+supersample = 4
+
+# Matplotlib's '*' marker: 5 points starting straight up, inner radius 0.381966 of the outer one
+marker_angles = np.pi / 2 + np.arange(10) * np.pi / 5
+marker_radii = np.where(np.arange(10) % 2 == 0, 1, 0.381966)
+unit_marker = np.column_stack((marker_radii * np.cos(marker_angles), marker_radii * np.sin(marker_angles)))
+
+
+# Function to turn any matplotlib color (name, hex or 0-1 tuple) into 0-255 RGBA
+def rgba(color, alpha=None):
+    from matplotlib.colors import to_rgba
+
+    return tuple(int(round(channel * 255)) for channel in to_rgba(color, alpha))
+
+
+# Function to draw a filled, outlined polygon as an antialiased sprite (points in pixels around the sprite center)
+def polygon_sprite(points, facecolor, edgecolor, line_width):
+    pad = line_width / 2 + 1
+    half_width = np.abs(points[:, 0]).max() + pad
+    half_height = np.abs(points[:, 1]).max() + pad
+    width, height = int(np.ceil(2 * half_width)), int(np.ceil(2 * half_height))
+
+    big = Image.new("RGBA", (width * supersample, height * supersample), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(big)
+    outline = [((x + width / 2) * supersample, (y + height / 2) * supersample) for x, y in points]
+    draw.polygon(outline, fill=facecolor)
+    if line_width > 0:
+        draw.line(outline + outline[:1], fill=edgecolor, width=max(int(round(line_width * supersample)), 1),
+                  joint="curve")
+    return big.resize((width, height), Image.Resampling.BOX)
+
+
+# Function to draw a filled polygon with an edge of the same color as an antialiased alpha mask
+def polygon_mask(points, line_width, alpha=1.0):
+    pad = line_width / 2 + 1
+    width = int(np.ceil(2 * (np.abs(points[:, 0]).max() + pad)))
+    height = int(np.ceil(2 * (np.abs(points[:, 1]).max() + pad)))
+
+    big = Image.new("L", (width * supersample, height * supersample), 0)
+    draw = ImageDraw.Draw(big)
+    outline = [((x + width / 2) * supersample, (y + height / 2) * supersample) for x, y in points]
+    value = int(round(255 * alpha))
+    draw.polygon(outline, fill=value)
+    if line_width > 0:
+        draw.line(outline + outline[:1], fill=value, width=max(int(round(line_width * supersample)), 1), joint="curve")
+    return big.resize((width, height), Image.Resampling.BOX)
+
+
+# Function to put a sprite on the canvas with its top left corner at (left, top), clipped to a box
+def composite(canvas, sprite, left, top, clip):
+    x0, y0 = max(left, clip[0]), max(top, clip[1])
+    x1, y1 = min(left + sprite.width, clip[2]), min(top + sprite.height, clip[3])
+    if x0 < x1 and y0 < y1:
+        canvas.alpha_composite(sprite, dest=(x0, y0), source=(x0 - left, y0 - top, x1 - left, y1 - top))
+
+
+# Stand-in for a matplotlib axis that records imshow/text/scatter calls and draws them with PIL
+class RasterAxes:
+    """
+    Maps data coordinates to pixels once (same subplot position and limits as setup_axes) and keeps a
+    list of draw commands. render() runs them in matplotlib's order (by zorder, then in the order they
+    were added) onto one preallocated RGBA canvas, scaling each cached sprite straight to its size on
+    the page instead of going through imshow resampling, offsetboxes and path rendering.
+
+    :param figsize: Width and height of the figure in inches
+    :param dpi: Resolution of the output
+    :param xlim, ylim: Data limits of the axis
+    """
+
+    def __init__(self, figsize, dpi, xlim, ylim):
+        from matplotlib import rcParams
+
+        self.dpi = dpi
+        self.width = int(round(figsize[0] * dpi))
+        self.height = int(round(figsize[1] * dpi))
+        self.xlim, self.ylim = xlim, ylim
+
+        # Axis box in pixels from the top left corner, where the default subplot puts it
+        left = rcParams["figure.subplot.left"] * self.width
+        right = rcParams["figure.subplot.right"] * self.width
+        top = (1 - rcParams["figure.subplot.top"]) * self.height
+        bottom = (1 - rcParams["figure.subplot.bottom"]) * self.height
+        self.box = (left, top, right, bottom)
+        self.clip = tuple(int(round(edge)) for edge in self.box)
+        self.scale_x = (right - left) / (xlim[1] - xlim[0])
+        self.scale_y = (bottom - top) / (ylim[1] - ylim[0])
+
+        self.commands = []
+        self.resized = {}  # (id(image), width, height) -> (image, resized image)
+        self.sprites = {}  # star and sparkle sprites, keyed by shape and color
+        self.fonts = {}
+
+    # Function to map data coordinates to pixels from the top left corner
+    def transform(self, x, y):
+        px = self.box[0] + (np.asarray(x, dtype=float) - self.xlim[0]) * self.scale_x
+        py = self.box[3] - (np.asarray(y, dtype=float) - self.ylim[0]) * self.scale_y
+        return px, py
+
+    # Function to queue a draw command, run later by render() in zorder
+    def add(self, zorder, draw):
+        self.commands.append((zorder, len(self.commands), draw))
+
+    def get_children(self):
+        return self.commands
+
+    # Function to get an image resized to (width, height), resizing each image only once per size
+    def resize(self, image, width, height):
+        key = (id(image), width, height)
+        if key not in self.resized:
+            source = image if isinstance(image, Image.Image) else Image.fromarray(np.asarray(image))
+            if source.mode != "RGBA":
+                source = source.convert("RGBA")
+            if width < source.width or height < source.height:
+                resized = source.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            else:
+                resized = source.resize((width, height), Image.Resampling.BILINEAR)
+            # Keep the original alive with its resized copy, so its id can't be reused by another image
+            self.resized[key] = (image, resized)
+        return self.resized[key][1]
+
+    def imshow(self, image, extent, aspect='auto', zorder=0, **kwargs):
+        x0, x1, y0, y1 = extent
+        (left, right), (bottom, top) = self.transform([x0, x1], [y0, y1])
+        left, right, top, bottom = (int(round(edge)) for edge in (left, right, top, bottom))
+
+        def draw(canvas):
+            if right > left and bottom > top:
+                composite(canvas, self.resize(image, right - left, bottom - top), left, top, self.clip)
+
+        self.add(zorder, draw)
+
+    def text(self, x, y, s, ha='left', va='baseline', fontsize=10, color='black', weight='normal', fontweight=None,
+             zorder=3, **kwargs):
+        from matplotlib import font_manager
+
+        weight = fontweight or weight
+        size = max(int(round(fontsize * self.dpi / 72)), 1)
+        if (weight, size) not in self.fonts:
+            path = font_manager.findfont(font_manager.FontProperties(family="sans-serif", weight=weight))
+            self.fonts[(weight, size)] = ImageFont.truetype(path, size)
+        font = self.fonts[(weight, size)]
+        anchor = {"left": "l", "center": "m", "right": "r"}[ha] + {"top": "a", "center": "m", "baseline": "s",
+                                                                   "bottom": "d"}[va]
+        px, py = self.transform(x, y)
+
+        def draw(canvas):
+            # Text isn't clipped to the axis, the same as matplotlib's default
+            ImageDraw.Draw(canvas).multiline_text((float(px), float(py)), s, font=font, fill=rgba(color), anchor=anchor,
+                                                  align=ha, spacing=int(0.2 * size))
+
+        self.add(zorder, draw)
+
+    def scatter(self, x, y, s, c, marker='*', cmap='viridis', alpha=None, zorder=1, **kwargs):
+        from matplotlib import colormaps, rcParams
+
+        px, py = self.transform(x, y)
+        c = np.asarray(c, dtype=float)
+        if c.size == 0:
+            return
+        levels = colormaps[cmap](np.linspace(0, 1, 256))
+        span = (c.max() - c.min()) or 1.0
+        color_index = np.clip(((c - c.min()) / span * 255).round().astype(int), 0, 255)
+
+        # Marker radius in pixels (s is the area in points^2) and the edge drawn in the face color
+        radius = np.sqrt(np.asarray(s, dtype=float)) / 2 * self.dpi / 72
+        line_width = rcParams["lines.linewidth"] * self.dpi / 72
+
+        def draw(canvas):
+            for x_pixel, y_pixel, r, index in zip(px, py, radius, color_index):
+                # Sizes are rounded to a quarter pixel, so there is one antialiased mask per size
+                # and a sprite is just a flat color with that mask as its alpha
+                size = round(r * 4) / 4
+                if ("marker", size, alpha) not in self.sprites:
+                    self.sprites[("marker", size, alpha)] = polygon_mask(unit_marker * [size, -size], line_width,
+                                                                         1.0 if alpha is None else alpha)
+                key = ("marker", size, alpha, int(index))
+                if key not in self.sprites:
+                    mask = self.sprites[("marker", size, alpha)]
+                    sprite = Image.new("RGBA", mask.size, rgba(tuple(levels[index][:3]), 0))
+                    sprite.putalpha(mask)
+                    self.sprites[key] = sprite
+                sprite = self.sprites[key]
+                composite(canvas, sprite, int(round(x_pixel - sprite.width / 2)), int(round(y_pixel - sprite.height / 2)),
+                          self.clip)
+
+        self.add(zorder, draw)
+
+    # Function to draw a burst star (outer radius in data units) as a cached sprite
+    def star(self, canvas, center_x, center_y, size, color, edgecolor, line_width):
+        key = ("star", size, color, edgecolor, line_width)
+        if key not in self.sprites:
+            points = unit_star * [size * self.scale_x, -size * self.scale_y]
+            self.sprites[key] = polygon_sprite(points, rgba(color), rgba(edgecolor), line_width * self.dpi / 72)
+        sprite = self.sprites[key]
+        px, py = self.transform(center_x, center_y)
+        composite(canvas, sprite, int(round(px - sprite.width / 2)), int(round(py - sprite.height / 2)), self.clip)
+
+    # Function to run every queued command onto a new transparent canvas
+    def render(self):
+        canvas = Image.new("RGBA", (self.width, self.height), (0, 0, 0, 0))
+        for _, _, draw in sorted(self.commands, key=lambda command: command[:2]):
+            draw(canvas)
+        return canvas
+
+    # Function to render and save as a PNG, written one strip at a time
+    # (zlib level 1 by default: about twice as fast as 6 for a slightly bigger file)
+    def save_png(self, output_path, level=1, strip_rows=1024):
+        canvas = self.render()
+
+        def strips():
+            for top in range(0, self.height, strip_rows):
+                yield np.asarray(canvas.crop((0, top, self.width, min(top + strip_rows, self.height))))
+
+        write_png(output_path, self.width, self.height, self.dpi, strips(), level=level)
+
+
+# Same interface as stars.StarBatch, for drawing onto a RasterAxes
+class RasterStarBatch:
+    def __init__(self, ax, edgecolor='black', lw=1.5):
+        self.ax = ax
+        self.edgecolor = edgecolor
+        self.lw = lw
+        self.queued = {}  # zorder -> list of (center_x, center_y, size, color)
+
+    def add(self, center_x, center_y, size, color='gold', zorder=3):
+        if zorder not in self.queued:
+            # Drawn at the point the first star with this zorder was queued, like the PolyCollection
+            self.queued[zorder] = []
+            self.ax.add(zorder, lambda canvas, stars=self.queued[zorder]: self.draw(canvas, stars))
+        self.queued[zorder].append((center_x, center_y, size, color))
+
+    def draw(self, canvas, stars):
+        for center_x, center_y, size, color in stars:
+            self.ax.star(canvas, center_x, center_y, size, color, self.edgecolor, self.lw)
+
+    def flush(self):
+        return []
+
+    def count(self):
+        return sum(len(stars) for stars in self.queued.values())
+
+
+# Same interface as stamps.StampBatch, for drawing onto a RasterAxes
+class RasterStampBatch:
+    def __init__(self, ax):
+        self.ax = ax
+        self.stamps = {}  # (image_path, zoom, zorder) -> list of (x, y)
+
+    def add(self, image_path, x, y, zoom=1, zorder=3):
+        key = (image_path, zoom, zorder)
+        if key not in self.stamps:
+            self.stamps[key] = []
+            self.ax.add(zorder, lambda canvas, key=key: self.draw(canvas, key))
+        self.stamps[key].append((x, y))
+
+    def draw(self, canvas, key):
+        image_path, zoom, _ = key
+        image, shrink = lod_icon(image_path)
+        zoom = zoom / shrink
+
+        # Same on-page size as OffsetImage: zoom * image size in points, and only points inside the axis
+        width = max(int(round(image.width * zoom * self.ax.dpi / 72)), 1)
+        height = max(int(round(image.height * zoom * self.ax.dpi / 72)), 1)
+        sprite = self.ax.resize(image, width, height)
+        full_page = (0, 0, self.ax.width, self.ax.height)
+        x0, y0, x1, y1 = self.ax.box
+        for x, y in self.stamps[key]:
+            px, py = self.ax.transform(x, y)
+            if x0 <= px <= x1 and y0 <= py <= y1:
+                composite(canvas, sprite, int(round(px - width / 2)), int(round(py - height / 2)), full_page)
+
+    def count(self):
+        return sum(len(points) for points in self.stamps.values())
@@ -0,0 +1,222 @@
+#python module to lay the timeline out once as a list of stars, images, stamps, labels and sparkles, then draw it anywhere
+import io
+import json
+
+import numpy as np
+
+from pdfexport import image_key
+
+# Bump this when the saved layout changes, so older scene files are refused instead of drawn wrong
+scene_version = 1
+
+
+# Function to find which cached icon (path, scale) an image came from, so a scene can refer to it instead of its pixels
+def icon_source(image):
+    from assets import icon_cache
+
+    for key, cached in icon_cache.images.items():
+        if cached is image:
+            return key
+    return None
+
+
+# Stand-in for a matplotlib axis that records what draw_layers draws as scene nodes instead of drawing it
+class SceneAxes:
+    """
+    Takes the same imshow/text/scatter calls as a matplotlib axis or a RasterAxes (and the stars and
+    stamps through SceneStarBatch/SceneStampBatch), and keeps each one as a node of the scene, in the
+    order they were made.
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+
+    def get_children(self):
+        return self.scene.nodes
+
+    def imshow(self, image, extent, aspect='auto', zorder=0, **kwargs):
+        self.scene.nodes.append({"kind": "image", "zorder": zorder, "extent": [float(edge) for edge in extent],
+                                 "image": self.scene.add_image(image)})
+
+    def text(self, x, y, s, zorder=3, **kwargs):
+        self.scene.nodes.append({"kind": "text", "zorder": zorder, "x": float(x), "y": float(y), "s": str(s),
+                                 "style": kwargs})
+
+    def scatter(self, x, y, s, c, marker='*', cmap='viridis', alpha=None, zorder=1, **kwargs):
+        self.scene.nodes.append({"kind": "scatter", "zorder": zorder, "marker": marker, "cmap": cmap, "alpha": alpha,
+                                 "x": np.asarray(x, dtype=float), "y": np.asarray(y, dtype=float),
+                                 "s": np.asarray(s, dtype=float), "c": np.asarray(c, dtype=float)})
+
+
+# Same interface as stars.StarBatch, keeping the stars of each zorder in one scene node
+class SceneStarBatch:
+    def __init__(self, ax):
+        self.scene = ax.scene
+        self.queued = {}  # zorder -> node
+
+    def add(self, center_x, center_y, size, color='gold', zorder=3):
+        if zorder not in self.queued:
+            self.queued[zorder] = {"kind": "stars", "zorder": zorder, "stars": []}
+            self.scene.nodes.append(self.queued[zorder])
+        self.queued[zorder]["stars"].append((float(center_x), float(center_y), float(size), color))
+
+    def flush(self):
+        return []
+
+    def count(self):
+        return sum(len(node["stars"]) for node in self.queued.values())
+
+
+# Same interface as stamps.StampBatch, keeping the spots of each icon, zoom and zorder in one scene node
+class SceneStampBatch:
+    def __init__(self, ax):
+        self.scene = ax.scene
+        self.stamps = {}  # (image_path, zoom, zorder) -> node
+
+    def add(self, image_path, x, y, zoom=1, zorder=3):
+        key = (image_path, zoom, zorder)
+        if key not in self.stamps:
+            self.stamps[key] = {"kind": "stamps", "zorder": zorder, "icon": str(image_path), "zoom": zoom,
+                                "points": []}
+            self.scene.nodes.append(self.stamps[key])
+        self.stamps[key]["points"].append((float(x), float(y)))
+
+    def count(self):
+        return sum(len(node["points"]) for node in self.stamps.values())
+
+
+# A laid out timeline: every star, image, stamp, label and sparkle with its position, zorder and style
+class Scene:
+    """
+    Made by layout_scene, drawn by render onto any axis that draw_layers can draw on (matplotlib
+    or RasterAxes, with their star and stamp batches), so one layout can be drawn at several sizes
+    and formats. Saved as one .npz file: the nodes as JSON, with the sparkles, star columns, stamp
+    points and the pixels of images that aren't icons (halos, the wand) as binary arrays. Icons are
+    stored as their path and scale, and each distinct image only once.
+
+    :param figsize: Width and height of the figure in inches it was laid out for
+    :param xlim, ylim: Data limits of the axis
+    :param lod: Level of detail it was laid out with (stamps pick their icon size from it when drawn)
+    """
+
+    def __init__(self, figsize, xlim, ylim, lod):
+        self.figsize = tuple(figsize)
+        self.xlim, self.ylim = tuple(xlim), tuple(ylim)
+        self.lod = lod
+        self.nodes = []
+        self.images = {}  # hash of the pixels -> image, for the images that aren't icons
+        self.image_keys = {}  # id(image) -> (image, reference), so each image is only hashed once
+
+    # Function to get the reference a node keeps to an image: the icon it came from, or the hash of its pixels
+    def add_image(self, image):
+        if id(image) not in self.image_keys:
+            source = icon_source(image)
+            if source is not None:
+                reference = {"icon": source[0], "scale": source[1]}
+            else:
+                key = image_key(np.asarray(image)).hex()
+                self.images.setdefault(key, image)
+                reference = {"pixels": key}
+            # Keep the image alive with its reference, so its id can't be reused by another image
+            self.image_keys[id(image)] = (image, reference)
+        return self.image_keys[id(image)][1]
+
+    # Function to get the image a node refers to
+    def image(self, reference):
+        from assets import icon_cache
+
+        if "icon" in reference:
+            return icon_cache.get(reference["icon"], reference["scale"])
+        return self.images[reference["pixels"]]
+
+    # Function to draw every node onto an axis, in the order they were laid out
+    def render(self, ax, stars, stamps):
+        for node in self.nodes:
+            kind = node["kind"]
+            if kind == "image":
+                ax.imshow(self.image(node["image"]), extent=node["extent"], aspect='auto', zorder=node["zorder"])
+            elif kind == "text":
+                ax.text(node["x"], node["y"], node["s"], zorder=node["zorder"], **node["style"])
+            elif kind == "scatter":
+                ax.scatter(node["x"], node["y"], s=node["s"], c=node["c"], marker=node["marker"], cmap=node["cmap"],
+                           alpha=node["alpha"], zorder=node["zorder"])
+            elif kind == "stars":
+                for center_x, center_y, size, color in node["stars"]:
+                    stars.add(center_x, center_y, size, color=color, zorder=node["zorder"])
+            elif kind == "stamps":
+                for x, y in node["points"]:
+                    stamps.add(node["icon"], x, y, zoom=node["zoom"], zorder=node["zorder"])
+        stars.flush()
+
+    def stats(self):
+        kinds = {}
+        for node in self.nodes:
+            kinds[node["kind"]] = kinds.get(node["kind"], 0) + 1
+        return {"nodes": len(self.nodes), "images": len(self.images), **kinds}
+
+    # Function to save the scene as one .npz file (JSON index plus binary arrays)
+    def save(self, path):
+        arrays = {}
+        nodes = []
+        for number, node in enumerate(self.nodes):
+            node = dict(node)
+            if node["kind"] == "scatter":
+                for column in ("x", "y", "s", "c"):
+                    arrays[f"{number}_{column}"] = node.pop(column)
+            elif node["kind"] == "stars":
+                centers_x, centers_y, sizes, colors = zip(*node.pop("stars"))
+                arrays[f"{number}_stars"] = np.array([centers_x, centers_y, sizes], dtype=float)
+                node["colors"] = list(colors)
+            elif node["kind"] == "stamps":
+                arrays[f"{number}_points"] = np.array(node.pop("points"), dtype=float)
+            nodes.append(node)
+        for key, image in self.images.items():
+            arrays[f"image_{key}"] = np.asarray(image)
+
+        index = {"version": scene_version, "figsize": self.figsize, "xlim": self.xlim, "ylim": self.ylim,
+                 "lod": self.lod, "nodes": nodes, "images": list(self.images)}
+        arrays["index"] = np.frombuffer(json.dumps(index).encode(), dtype=np.uint8)
+        with open(path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+
+    # Function to load a scene saved by save
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            arrays = dict(np.load(io.BytesIO(file.read())))
+        index = json.loads(arrays.pop("index").tobytes())
+        if index["version"] != scene_version:
+            raise ValueError(f"{path} is a version {index['version']} scene, this code reads version {scene_version}")
+
+        scene = cls(index["figsize"], index["xlim"], index["ylim"], index["lod"])
+        for key in index["images"]:
+            scene.images[key] = arrays[f"image_{key}"]
+        for number, node in enumerate(index["nodes"]):
+            if node["kind"] == "scatter":
+                for column in ("x", "y", "s", "c"):
+                    node[column] = arrays[f"{number}_{column}"]
+            elif node["kind"] == "stars":
+                # JSON turns color tuples into lists, the star batches need them hashable again
+                colors = [tuple(color) if isinstance(color, list) else color for color in node.pop("colors")]
+                node["stars"] = [(*center, color) for center, color in zip(arrays[f"{number}_stars"].T.tolist(), colors)]
+            elif node["kind"] == "stamps":
+                node["points"] = [tuple(point) for point in arrays[f"{number}_points"].tolist()]
+            scene.nodes.append(node)
+        return scene
+
+
+# Function to lay out a timeline as a Scene, without drawing anything
+def layout_scene(df, activity_colors, rng=None, figsize=(72, 72), layout="spiral", lod=None, dpi=300):
+    """
+    :param lod: Level of detail ("thumbnail", "draft" or "print"), or None to pick it from dpi and figsize
+    :param dpi: Resolution the scene will mostly be drawn at (only used to pick the level of detail)
+    """
+    from lod import level_of_detail, pick_lod
+    from timeline7 import draw_layers, xlim, ylim
+
+    lod = lod or pick_lod(dpi, figsize)
+    scene = Scene(figsize, xlim, ylim, lod)
+    ax = SceneAxes(scene)
+    with level_of_detail(lod):
+        draw_layers(ax, df, activity_colors, SceneStarBatch(ax), SceneStampBatch(ax), rng=rng, layout=layout)
+    return scene
@@ -0,0 +1,57 @@
+#python module to build the sparkle trail along the spiral in one go (shared by the timeline and the tote)
+import numpy as np
+
+
+# Function to get the distance along a path at each of its points
+def arc_lengths(x, y):
+    return np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))])
+
+
+# Function to place count points evenly by distance along a path (a short segment gets as few as its length needs)
+def resample_path(x, y, count):
+    """
+    :param x, y: Points along the path
+    :param count: Number of points to put along it, from its first point to its last
+    :return: x, y of the new points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    distance = arc_lengths(x, y)
+    along = np.linspace(0, distance[-1], count)
+    # Repeated points (zero length segments) just give np.interp a flat step, which it handles
+    return np.interp(along, distance, x), np.interp(along, distance, y)
+
+
+# Function to generate the sparkle points for a whole path at once, spread evenly by distance along it
+def sparkle_trail(x, y, density=8.0, jitter=0.3, max_size=15, rng=None):
+    """
+    The number of sparkles follows the length of the path, not the number of points on it, so the
+    short segments in the middle of the spiral don't turn into blobs and the long outer ones don't
+    thin out.
+
+    :param x, y: Points along the path
+    :param density: Sparkles per data unit of path length
+    :param jitter: Maximum random offset of each sparkle (in data units)
+    :param max_size: Maximum marker size of a sparkle
+    :param rng: numpy.random.Generator to draw from (pass a seeded one for reproducible renders)
+    :return: x, y, sizes and colors of all sparkles as flat arrays
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    total = int(round(arc_lengths(x, y)[-1] * density)) if len(x) > 1 else 0
+
+    x_sparkles, y_sparkles = resample_path(x, y, total) if total else (np.empty(0), np.empty(0))
+    x_sparkles += rng.uniform(-jitter, jitter, size=total)
+    y_sparkles += rng.uniform(-jitter, jitter, size=total)
+    sizes = rng.random(total) * max_size
+    colors = rng.random(total)
+    return x_sparkles, y_sparkles, sizes, colors
+
+
+# Function to draw the whole sparkle trail as a single scatter collection
+def draw_sparkle_trail(ax, x, y, density=8.0, jitter=0.3, max_size=15, rng=None):
+    x_sparkles, y_sparkles, sizes, colors = sparkle_trail(x, y, density, jitter, max_size, rng)
+    return ax.scatter(x_sparkles, y_sparkles, s=sizes, c=colors, marker='*', cmap='cividis', alpha=0.9, zorder=-1)
@@ -0,0 +1,132 @@
+#python module to build the mini star sprites with numpy instead of drawing them ring by ring
+import numpy as np
+from PIL import Image, ImageDraw
+
+from profiling import profiled
+
+# Star outlines as fractions of the circle size
+# "shooting" is the star used on the timeline, "centered" is the smaller one used by the legend swirls
+star_shapes = {
+    "shooting": [
+        (0.5, 0), (0.6, 0.35), (1, 0.35), (0.7, 0.6), (0.8, 1), (0.5, 0.75),
+        (0.2, 1), (0.3, 0.6), (0, 0.35), (0.4, 0.35)
+    ],
+    "centered": [
+        (0.5, 0.1), (0.6, 0.35), (0.9, 0.35), (0.65, 0.55), (0.75, 0.85), (0.5, 0.7),
+        (0.25, 0.85), (0.35, 0.55), (0.1, 0.35), (0.4, 0.35)
+    ],
+}
+
+# Sprites that have already been built, keyed by (color, circle_size, line_width, tail_length, shape)
+sprite_cache = {}
+
+
+# Function to get a mini star sprite, building it only the first time it is asked for
+@profiled("mini star sprite")
+def mini_star_sprite(color, circle_size=200, line_width=3, tail_length=30, shape="shooting"):
+    """
+    Returns the mini shooting star as an RGBA image.
+
+    The image is shared between callers, so it must not be drawn on.
+
+    :param color: RGB tuple for the star
+    :param circle_size: Size of the circle around the star (in pixels)
+    :param line_width: Width of each ring of the radial gradient
+    :param tail_length: Length of the fading tail (0 for no tail)
+    :param shape: Key in star_shapes
+    """
+    color = tuple(color)
+    key = (color, circle_size, line_width, tail_length, shape)
+    if key not in sprite_cache:
+        sprite_cache[key] = build_mini_star(*key)
+    return sprite_cache[key]
+
+
+# Function to build the radial gradient circle as one array
+def radial_gradient(color, circle_size, line_width):
+    # Each ring i (from the outside in) is the ellipse outline drawn in the box [i, i, circle_size - i, circle_size - i],
+    # covering the band from radius center - i - line_width to center - i (plus half a pixel, to match how PIL rasterizes the outline).
+    # Inner rings are painted last, so every pixel ends up with the shade of the smallest ring covering it
+    center = circle_size / 2
+    steps = circle_size // 2
+    coords = np.arange(circle_size)
+    dist = np.hypot(coords[None, :] - center, coords[:, None] - center)
+
+    ring = np.maximum(np.ceil(center - dist - line_width + 0.5), 1)
+    inside = ring <= center - dist + 0.5
+
+    pixels = np.zeros((circle_size, circle_size, 4), dtype=np.uint8)
+    shade = np.floor(np.asarray(color, dtype=float) * (ring / steps)[..., None])
+    pixels[..., :3] = np.where(inside[..., None], shade, 255)  # Transparent white outside the circle
+    pixels[..., 3] = np.where(inside, 255, 0)
+    return pixels
+
+
+def build_mini_star(color, circle_size, line_width, tail_length, shape):
+    pixels = np.zeros((circle_size, circle_size + tail_length, 4), dtype=np.uint8)
+    pixels[..., :3] = 255
+    pixels[:, :circle_size] = radial_gradient(color, circle_size, line_width)
+
+    # Add the tail effect (simulating a shooting star), fading towards the end
+    if tail_length:
+        row = int(circle_size * 0.5)
+        pixels[row:row + 2, int(circle_size * 0.9):circle_size] = color + (255,)
+        fade = (255 * (1 - np.arange(1, tail_length + 1) / tail_length)).astype(np.uint8)
+        pixels[row:row + 2, circle_size:, :3] = color
+        pixels[row:row + 2, circle_size:, 3] = fade
+
+    img = Image.fromarray(pixels, 'RGBA')
+
+    # Draw the star in the center with the same tone (a single polygon fill)
+    points = [(circle_size * px, circle_size * py) for px, py in star_shapes[shape]]
+    ImageDraw.Draw(img).polygon(points, fill=color)
+
+    return img
+
+
+# Halo rings that have already been composited, keyed by (color, radius, num_mini_stars, ...)
+halo_cache = {}
+
+
+# Function to get the ring of mini stars around an activity as one pre-blended image
+@profiled("halo sprite")
+def halo_sprite(color, radius=10, num_mini_stars=150, star_size=2, circle_size=60, line_width=5, tail_length=30):
+    """
+    Returns the whole mini star ring as a single RGBA image, so it can be placed with one imshow.
+
+    The image covers a square of radius + star_size / 2 data units around the ring center,
+    with each mini star stretched over a star_size x star_size square like the old per-star imshow.
+
+    :param color: RGB tuple for the mini stars
+    :param radius: Radius of the ring (in data units)
+    :param num_mini_stars: Number of mini stars around the ring
+    :param star_size: Width and height of each mini star (in data units)
+    :param circle_size, line_width, tail_length: Passed on to mini_star_sprite
+    """
+    color = tuple(color)
+    key = (color, radius, num_mini_stars, star_size, circle_size, line_width, tail_length)
+    if key not in halo_cache:
+        halo_cache[key] = build_halo(*key)
+    return halo_cache[key]
+
+
+def build_halo(color, radius, num_mini_stars, star_size, circle_size, line_width, tail_length):
+    # Keep the mini star at its own resolution: circle_size pixels per star_size data units
+    pixels_per_unit = circle_size / star_size
+    half_extent = radius + star_size / 2
+    canvas_size = int(round(2 * half_extent * pixels_per_unit))
+
+    # Squash the sprite into a square, the same way imshow(aspect='auto') stretched it into its extent
+    star = mini_star_sprite(color, circle_size=circle_size, line_width=line_width, tail_length=tail_length)
+    star = star.resize((circle_size, circle_size), Image.Resampling.LANCZOS)
+
+    # Top left corner of every mini star, in pixels (image rows grow downwards while y grows upwards)
+    angle = np.linspace(0, 2 * np.pi, num_mini_stars, endpoint=False)
+    left = np.rint((radius * np.cos(angle) + radius) * pixels_per_unit).astype(int)
+    top = np.rint((radius - radius * np.sin(angle)) * pixels_per_unit).astype(int)
+
+    # Blend them in the same order the separate imshow calls were stacked
+    halo = Image.new('RGBA', (canvas_size, canvas_size), (255, 255, 255, 0))
+    for x_pos, y_pos in zip(left, top):
+        halo.alpha_composite(star, (int(x_pos), int(y_pos)))
+    return halo
@@ -0,0 +1,90 @@
+#python module to place the same small image (hearts, companion icons) at many points with one artist
+import numpy as np
+from matplotlib.artist import Artist
+from PIL import Image
+
+from lod import lod_icon
+
+
+# Artist that draws one image at every queued position
+class ImageStamps(Artist):
+    """
+    Draws the same image centered on many data points, like a stack of AnnotationBbox(OffsetImage(...))
+    artists but without laying out an offsetbox for each one.
+
+    The image keeps a fixed size on the page (zoom * image size in points), and only points
+    inside the axes are drawn, the same as AnnotationBbox does for data coordinates.
+
+    :param image: RGBA image (PIL image or uint8 array)
+    :param zoom: Scale of the image, as in OffsetImage
+    """
+
+    def __init__(self, image, zoom=1, zorder=3):
+        super().__init__()
+        self.image = np.asarray(image.convert('RGBA') if isinstance(image, Image.Image) else image)
+        self.zoom = zoom
+        self.positions = []
+        self.resized = {}  # (width, height) -> resampled image, so each dpi only resamples once
+        self.set_zorder(zorder)
+
+    def add(self, x, y):
+        self.positions.append((x, y))
+        self.stale = True
+
+    def count(self):
+        return len(self.positions)
+
+    def resample(self, width, height):
+        if (width, height) not in self.resized:
+            img = Image.fromarray(self.image).resize((width, height), Image.Resampling.LANCZOS)
+            self.resized[(width, height)] = np.asarray(img)[::-1]  # Renderers expect the bottom row first
+        return self.resized[(width, height)]
+
+    def draw(self, renderer):
+        if not self.get_visible() or not self.positions:
+            return
+
+        # Same on-page size as OffsetImage: zoom * image size in points
+        scale = self.zoom * renderer.points_to_pixels(1.0)
+        width = max(int(round(self.image.shape[1] * scale)), 1)
+        height = max(int(round(self.image.shape[0] * scale)), 1)
+        img = self.resample(width, height)
+
+        # Map every position to display pixels in one transform and drop the ones outside the axes
+        points = self.axes.transData.transform(np.asarray(self.positions, dtype=float))
+        x0, y0, x1, y1 = self.axes.bbox.extents
+        inside = (points[:, 0] >= x0) & (points[:, 0] <= x1) & (points[:, 1] >= y0) & (points[:, 1] <= y1)
+
+        gc = renderer.new_gc()
+        gc.set_alpha(self.get_alpha())
+        for x, y in points[inside]:
+            renderer.draw_image(gc, round(x - width / 2), round(y - height / 2), img)
+        gc.restore()
+        self.stale = False
+
+
+# Collects image stamps and draws each image with a single artist
+class StampBatch:
+    """
+    Keeps one ImageStamps artist per (image path, zoom, zorder).
+
+    The artist for an image is added to the axis the first time that image is queued, so it
+    keeps its place in the drawing order relative to the other artists at the same zorder.
+
+    :param ax: Matplotlib axis
+    """
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.stamps = {}
+
+    def add(self, image_path, x, y, zoom=1, zorder=3):
+        key = (image_path, zoom, zorder)
+        if key not in self.stamps:
+            # Decoded once through the shared icon cache, and no bigger than the level of detail needs
+            image, shrink = lod_icon(image_path)
+            self.stamps[key] = self.ax.add_artist(ImageStamps(image, zoom=zoom / shrink, zorder=zorder))
+        self.stamps[key].add(x, y)
+
+    def count(self):
+        return sum(stamps.count() for stamps in self.stamps.values())
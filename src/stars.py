@@ -0,0 +1,66 @@
+#python module to build burst star outlines for many stars at once
+import numpy as np
+
+# Outline of a 5-point star with a unit outer radius: 10 points alternating between the outer and inner radius
+star_angles = np.linspace(0, 2 * np.pi, 11)[:-1]  # Skip last point to avoid duplication
+star_radii = np.where(np.arange(10) % 2 == 0, 1, 1 / 2.5)
+unit_star = np.column_stack((star_radii * np.cos(star_angles), star_radii * np.sin(star_angles)))
+
+
+# Function to compute the vertices of N stars in one broadcast
+def star_vertices(center_x, center_y, size):
+    """
+    :param center_x, center_y: Star centers (scalars or arrays of length N)
+    :param size: Outer radius of each star (scalar or array of length N)
+    :return: Array of shape (N, 10, 2) with the outline of every star
+    """
+    center_x, center_y, size = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(center_x, dtype=float)),
+        np.atleast_1d(np.asarray(center_y, dtype=float)),
+        np.atleast_1d(np.asarray(size, dtype=float)),
+    )
+    centers = np.stack((center_x, center_y), axis=-1)
+    return centers[:, None, :] + size[:, None, None] * unit_star[None, :, :]
+
+
+# Collects burst stars and draws them as one collection per z-order
+class StarBatch:
+    """
+    Queues stars and draws every star that shares a z-order as a single PolyCollection.
+
+    The collection for a z-order is added to the axis the first time a star with that
+    z-order is queued, so it keeps its place in the drawing order relative to the other
+    artists at the same z-order (e.g. the icons drawn on top of the burst stars).
+    Call flush() once all stars are queued to fill in the collections.
+
+    :param ax: Matplotlib axis
+    """
+
+    def __init__(self, ax, edgecolor='black', lw=1.5):
+        self.ax = ax
+        self.edgecolor = edgecolor
+        self.lw = lw
+        self.queued = {}  # zorder -> (center_x, center_y, size, color) lists
+        self.collections = {}  # zorder -> PolyCollection
+
+    def add(self, center_x, center_y, size, color='gold', zorder=3):
+        if zorder not in self.queued:
+            from matplotlib.collections import PolyCollection
+
+            self.queued[zorder] = ([], [], [], [])
+            collection = PolyCollection([], edgecolors=self.edgecolor, linewidths=self.lw, zorder=zorder)
+            self.collections[zorder] = self.ax.add_collection(collection, autolim=False)
+
+        for values, value in zip(self.queued[zorder], (center_x, center_y, size, color)):
+            values.append(value)
+
+    # Function to compute the vertices of all queued stars and hand them to their collections
+    def flush(self):
+        for zorder, (center_x, center_y, size, color) in self.queued.items():
+            collection = self.collections[zorder]
+            collection.set_verts(star_vertices(center_x, center_y, size))
+            collection.set_facecolor(color)
+        return list(self.collections.values())
+
+    def count(self):
+        return sum(len(values[0]) for values in self.queued.values())
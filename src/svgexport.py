@@ -0,0 +1,422 @@
+#python module to save a figure as an SVG where every repeated shape and image is only written once
+import base64
+import hashlib
+import io
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+from PIL import Image
+
+# Shapes are compared after rounding their outline to this many decimals of a point, so stars and sparkles that
+# only differ by float noise (or by less than a tenth of a point) share one definition
+decimals = 1
+
+# Resolution the embedded images are resampled to when they are drawn smaller than their own size
+image_dpi = 300
+
+
+# Function to turn a 0-1 RGBA color into an SVG color and its opacity
+def svg_color(color):
+    red, green, blue, alpha = (float(channel) for channel in color)
+    return "#{:02x}{:02x}{:02x}".format(*(int(round(channel * 255)) for channel in (red, green, blue))), alpha
+
+
+# Function to write a number with at most two decimals and no trailing zeros
+def num(value):
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+# Function to write an outline (vertices already in SVG points) as SVG path data
+def path_data(vertices, codes=None):
+    from matplotlib.path import Path
+
+    if codes is None:
+        codes = [Path.MOVETO] + [Path.LINETO] * (len(vertices) - 1)
+    parts = []
+    index = 0
+    while index < len(vertices):
+        code = codes[index]
+        if code == Path.CLOSEPOLY:
+            parts.append("Z")
+            index += 1
+            continue
+        # Quadratic and cubic curves take the next 2 or 3 vertices
+        letter, count = {Path.MOVETO: ("M", 1), Path.CURVE3: ("Q", 2), Path.CURVE4: ("C", 3)}.get(code, ("L", 1))
+        points = vertices[index:index + count]
+        parts.append(letter + " ".join(f"{num(x)} {num(y)}" for x, y in points))
+        index += count
+    return "".join(parts)
+
+
+# Function to write an element's fill and stroke as SVG attributes
+def paint(face=None, edge=None, line_width=0):
+    attributes = []
+    if face is not None and face[3] > 0:
+        color, alpha = svg_color(face)
+        attributes.append(f'fill="{color}"' + (f' fill-opacity="{num(alpha)}"' if alpha < 1 else ""))
+    else:
+        attributes.append('fill="none"')
+    if edge is not None and edge[3] > 0 and line_width > 0:
+        color, alpha = svg_color(edge)
+        attributes.append(f'stroke="{color}"' + (f' stroke-opacity="{num(alpha)}"' if alpha < 1 else ""))
+    return " ".join(attributes)
+
+
+# One SVG file being built: shared definitions, the elements that use them and the area they cover
+class SvgDocument:
+    """
+    Every shape (relative to its own center) and every image (by a hash of its pixels) goes into <defs>
+    once, and each time it is drawn is a <use> with just a position, so a sparkle trail of 75k stars is
+    75k short <use> lines plus a few dozen outlines, and a halo drawn for 27 activities is embedded once.
+
+    :param width, height: Size of the page in points
+    :param image_dpi: Resolution to resample the embedded images to (they are never enlarged)
+    """
+
+    def __init__(self, width, height, image_dpi=image_dpi):
+        self.width = width
+        self.height = height
+        self.image_dpi = image_dpi
+        self.defs = []
+        self.body = []
+        self.shapes = {}  # (path data, stroke width) -> id
+        self.images = {}  # hash of the pixels -> [id, RGBA pixels, biggest width and height it is drawn at (points)]
+        self.uses = 0
+        self.bounds = [np.inf, np.inf, -np.inf, -np.inf]
+
+    # Function to get the id of a shape, adding it to the definitions the first time it is seen
+    def shape(self, data, line_width):
+        key = (data, round(line_width, 3))
+        if key not in self.shapes:
+            self.shapes[key] = f"s{len(self.shapes)}"
+            stroke = f' stroke-width="{num(line_width)}"' if line_width > 0 else ""
+            self.defs.append(f'<path id="{self.shapes[key]}" d="{data}"{stroke}/>')
+        return self.shapes[key]
+
+    # Function to get the id of an image, keeping track of the biggest size it is drawn at
+    def image(self, pixels, width, height):
+        key = hashlib.sha1(pixels.tobytes() + str(pixels.shape).encode()).hexdigest()
+        if key not in self.images:
+            self.images[key] = [f"i{len(self.images)}", pixels, 0.0, 0.0]
+        entry = self.images[key]
+        entry[2] = max(entry[2], abs(width))
+        entry[3] = max(entry[3], abs(height))
+        return entry[0]
+
+    # Function to grow the area covered by the drawing (for a tight page), clipped to a box if given
+    def extend(self, x0, y0, x1, y1, clip=None):
+        if clip is not None:
+            x0, y0, x1, y1 = max(x0, clip[0]), max(y0, clip[1]), min(x1, clip[2]), min(y1, clip[3])
+            if x0 >= x1 or y0 >= y1:
+                return
+        self.bounds = [min(self.bounds[0], x0), min(self.bounds[1], y0),
+                       max(self.bounds[2], x1), max(self.bounds[3], y1)]
+
+    # Function to add a rectangle that clips the elements inside it, returning its id
+    def clip_path(self, x0, y0, x1, y1):
+        clip_id = f"c{sum(line.startswith('<clipPath') for line in self.defs)}"
+        self.defs.append(f'<clipPath id="{clip_id}"><rect x="{num(x0)}" y="{num(y0)}" width="{num(x1 - x0)}" '
+                         f'height="{num(y1 - y0)}"/></clipPath>')
+        return clip_id
+
+    # Function to encode an image as a base64 PNG, resampled down to the biggest size it is drawn at
+    def encode(self, pixels, width, height):
+        img = Image.fromarray(pixels, "RGBA")
+        target = (max(int(np.ceil(width * self.image_dpi / 72)), 1), max(int(np.ceil(height * self.image_dpi / 72)), 1))
+        if target[0] < img.width and target[1] < img.height:
+            img = img.resize(target, Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+        return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    # Function to write the file, on the whole page or (tight) only the area the drawing covers plus a pad
+    def write(self, output_path, tight=False, pad=7.2, background=None):
+        if tight and np.isfinite(self.bounds).all():
+            x0, y0 = self.bounds[0] - pad, self.bounds[1] - pad
+            width, height = self.bounds[2] - self.bounds[0] + 2 * pad, self.bounds[3] - self.bounds[1] + 2 * pad
+        else:
+            x0, y0, width, height = 0, 0, self.width, self.height
+
+        with open(output_path, "w", encoding="utf-8") as file:
+            file.write('<?xml version="1.0" encoding="utf-8" standalone="no"?>\n')
+            file.write(f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                       f'version="1.1" width="{num(width)}pt" height="{num(height)}pt" '
+                       f'viewBox="{num(x0)} {num(y0)} {num(width)} {num(height)}">\n')
+            file.write('<defs>\n')
+            for line in self.defs:
+                file.write(line + "\n")
+            # Images are drawn into a 1x1 box and each <use> scales them to their size on the page
+            for image_id, pixels, image_width, image_height in self.images.values():
+                file.write(f'<image id="{image_id}" width="1" height="1" preserveAspectRatio="none" '
+                           f'xlink:href="data:image/png;base64,{self.encode(pixels, image_width, image_height)}"/>\n')
+            file.write('</defs>\n')
+            if background is not None:
+                file.write(f'<rect x="{num(x0)}" y="{num(y0)}" width="{num(width)}" height="{num(height)}" '
+                           f'{paint(background)}/>\n')
+            file.write('<g stroke-linejoin="round" stroke-linecap="butt">\n')
+            file.writelines(self.body)
+            file.write('</g>\n</svg>\n')
+
+    def stats(self):
+        return {"shapes": len(self.shapes), "images": len(self.images), "uses": self.uses}
+
+
+# Writes the artists of a matplotlib figure into an SvgDocument, in the order matplotlib draws them
+class SvgExporter:
+    """
+    Knows the artists the timeline and tote scripts make: lines, collections (the burst stars and the
+    sparkle scatter), imshow images, ImageStamps, text and plain patches. Anything else is skipped
+    with a message.
+
+    :param fig: Matplotlib figure to export (it doesn't need to have been drawn or shown)
+    """
+
+    def __init__(self, fig, image_dpi=image_dpi):
+        self.fig = fig
+        self.scale = 72 / fig.dpi
+        self.page_height = fig.get_figheight() * 72
+        self.doc = SvgDocument(fig.get_figwidth() * 72, self.page_height, image_dpi)
+
+    # Function to map display pixels (from the bottom left) to SVG points (from the top left)
+    def to_svg(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return np.column_stack((points[:, 0] * self.scale, self.page_height - points[:, 1] * self.scale))
+
+    def export(self):
+        from matplotlib.axis import Axis
+
+        for ax in self.fig.axes:
+            (x0, y0), (x1, y1) = self.to_svg(ax.bbox.get_points())
+            box = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+            clip_id = self.doc.clip_path(*box)
+
+            # Same artists and order as Axes.draw: the background and frame only when the axis is on
+            skip = set() if ax.axison else set(ax.spines.values())
+            if not (ax.axison and ax.get_frame_on()):
+                skip.add(ax.patch)
+            for artist in sorted(ax.get_children(), key=lambda artist: artist.get_zorder()):
+                if artist in skip or not artist.get_visible() or (isinstance(artist, Axis) and not ax.axison):
+                    continue
+                clipped = artist.get_clip_on() and (artist.get_clip_box() is not None or
+                                                    artist.get_clip_path() is not None)
+                start = len(self.doc.body)
+                self.artist(artist, ax, box if clipped else None)
+                if clipped and len(self.doc.body) > start:
+                    self.doc.body.insert(start, f'<g clip-path="url(#{clip_id})">\n')
+                    self.doc.body.append('</g>\n')
+        return self.doc
+
+    # Function to write one artist, picking the writer for its type
+    def artist(self, artist, ax, clip):
+        from matplotlib.collections import Collection
+        from matplotlib.image import AxesImage
+        from matplotlib.lines import Line2D
+        from matplotlib.patches import Patch
+        from matplotlib.text import Text
+
+        from stamps import ImageStamps
+
+        if isinstance(artist, Collection):
+            self.collection(artist, clip)
+        elif isinstance(artist, AxesImage):
+            self.axes_image(artist, clip)
+        elif isinstance(artist, ImageStamps):
+            self.image_stamps(artist, ax)
+        elif isinstance(artist, Line2D):
+            self.line(artist, clip)
+        elif isinstance(artist, Text):
+            self.text(artist)
+        elif isinstance(artist, Patch):
+            self.patch(artist, clip)
+        else:
+            print(f"SVG export: skipping {type(artist).__name__}")
+
+    # Function to write every path of a collection as a <use> of a shared outline
+    def collection(self, collection, clip):
+        paths = collection.get_paths()
+        offsets = collection.get_offset_transform().transform(collection.get_offsets())
+        # A scatter of no points (the sparkles of a one row day) still has its marker path, but draws nothing
+        count = max(len(paths), len(offsets)) if len(paths) and len(offsets) else 0
+        if count == 0:
+            return
+
+        # Colors from a colormap and marker sizes at this figure's dpi are normally only set when drawing
+        collection.update_scalarmappable()
+        if hasattr(collection, "set_sizes") and len(collection.get_sizes()):
+            collection.set_sizes(collection.get_sizes(), self.fig.dpi)
+        transforms = collection.get_transforms()
+        master = collection.get_transform()
+        faces, edges = collection.get_facecolor(), collection.get_edgecolor()
+        line_widths = collection.get_linewidth()
+
+        # Outline of every element in display pixels: one broadcast when they share one path (the scatter)
+        outlines = []
+        if len(paths) == 1:
+            vertices = paths[0].vertices
+            if len(transforms):
+                matrices = transforms[np.arange(count) % len(transforms)]
+                vertices = np.einsum("nij,kj->nki", matrices[:, :2, :2], vertices) + matrices[:, None, :2, 2]
+            else:
+                vertices = np.broadcast_to(vertices, (count,) + vertices.shape)
+            vertices = master.transform(vertices.reshape(-1, 2)).reshape(count, -1, 2)
+            vertices = vertices + offsets[np.arange(count) % len(offsets)][:, None, :]
+            outlines = [(paths[0].codes, vertices)]
+        else:
+            for index in range(count):
+                vertices = paths[index % len(paths)].vertices
+                if len(transforms):
+                    matrix = transforms[index % len(transforms)]
+                    vertices = vertices @ matrix[:2, :2].T + matrix[:2, 2]
+                vertices = master.transform(vertices) + offsets[index % len(offsets)]
+                outlines.append((paths[index % len(paths)].codes, vertices[None]))
+
+        # Every outline relative to the center of its bounding box, rounded so the same shape gives the same key
+        # (the stroke width is part of the key too, it goes into the definition so elements only carry colors)
+        widths = np.asarray(line_widths if len(line_widths) else [0.0], dtype=float)
+        shape_ids, centers, start = [], [], 0
+        for codes, vertices in outlines:
+            points = self.to_svg(vertices.reshape(-1, 2)).reshape(vertices.shape)
+            center = (points.min(axis=1) + points.max(axis=1)) / 2
+            relative = np.round(points - center[:, None, :], decimals).reshape(len(points), -1)
+            element_widths = widths[(start + np.arange(len(points))) % len(widths)]
+            unique, inverse = np.unique(np.column_stack((relative, element_widths)), axis=0, return_inverse=True)
+            ids = []
+            for row in unique:
+                outline = row[:-1].reshape(-1, 2)
+                ids.append((self.doc.shape(path_data(outline, codes), row[-1]), outline.min(axis=0),
+                            outline.max(axis=0)))
+            shape_ids.extend(ids[index] for index in inverse.ravel())
+            centers.extend(center)
+            start += len(points)
+
+        # Colors go on each <use> (or on the group, when every element has the same ones), and the opacities,
+        # which are normally the same for a whole collection, on a <g> around each run that shares them
+        styles = []
+        for index in range(len(shape_ids)):
+            face = faces[index % len(faces)] if len(faces) else None
+            edge = edges[index % len(edges)] if len(edges) else None
+            line_width = line_widths[index % len(line_widths)] if len(line_widths) else 0
+            attributes = paint(face, edge, line_width).split()
+            styles.append((" ".join(a for a in attributes if "opacity" in a),
+                           " ".join(a for a in attributes if "opacity" not in a)))
+        shared = len(set(color for _, color in styles)) == 1
+
+        body, current = self.doc.body, None
+        for (shape_id, low, high), (x, y), (opacity, color) in zip(shape_ids, centers, styles):
+            group = f"{opacity} {color}" if shared else opacity
+            if group != current:
+                if current is not None:
+                    body.append('</g>\n')
+                body.append(f'<g {group}>\n' if group else '<g>\n')
+                current = group
+            own = "" if shared else f" {color}"
+            body.append(f'<use xlink:href="#{shape_id}" x="{num(x)}" y="{num(y)}"{own}/>\n')
+            self.doc.extend(x + low[0], y + low[1], x + high[0], y + high[1], clip)
+        body.append('</g>\n')
+        self.doc.uses += len(shape_ids)
+
+    # Function to place one image, scaled from its shared 1x1 definition
+    def place_image(self, pixels, x0, y0, x1, y1, alpha=None, clip=None):
+        image_id = self.doc.image(pixels, x1 - x0, y1 - y0)
+        opacity = f' opacity="{num(alpha)}"' if alpha is not None and alpha < 1 else ""
+        self.doc.body.append(f'<use xlink:href="#{image_id}" '
+                             f'transform="matrix({num(x1 - x0)} 0 0 {num(y1 - y0)} {num(x0)} {num(y0)})"{opacity}/>\n')
+        self.doc.extend(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1), clip)
+        self.doc.uses += 1
+
+    def axes_image(self, image, clip):
+        pixels = image.to_rgba(np.asarray(image.get_array()), bytes=True)
+        left, right, bottom, top = image.get_extent()
+        # Row 0 of the array is at the top of the extent for origin='upper' and at the bottom for 'lower'
+        first, last = (top, bottom) if image.origin == "upper" else (bottom, top)
+        (x0, y0), (x1, y1) = self.to_svg(image.get_transform().transform([(left, first), (right, last)]))
+        self.place_image(np.ascontiguousarray(pixels), x0, y0, x1, y1, image.get_alpha(), clip)
+
+    # Function to place an ImageStamps image at each of its points (only the ones inside the axis, like its draw)
+    def image_stamps(self, stamps, ax):
+        if not stamps.positions:
+            return
+        pixels = stamps.image
+        if pixels.ndim == 2 or pixels.shape[2] != 4:
+            pixels = np.asarray(Image.fromarray(pixels).convert("RGBA"))
+        width, height = pixels.shape[1] * stamps.zoom, pixels.shape[0] * stamps.zoom
+        points = ax.transData.transform(np.asarray(stamps.positions, dtype=float))
+        x0, y0, x1, y1 = ax.bbox.extents
+        inside = (points[:, 0] >= x0) & (points[:, 0] <= x1) & (points[:, 1] >= y0) & (points[:, 1] <= y1)
+        for x, y in self.to_svg(points[inside]):
+            self.place_image(pixels, x - width / 2, y - height / 2, x + width / 2, y + height / 2, stamps.get_alpha())
+
+    def line(self, line, clip):
+        from matplotlib.colors import to_rgba
+
+        points = self.to_svg(line.get_transform().transform(line.get_xydata()))
+        if line.get_linestyle() in ("None", "", " ") or len(points) == 0:
+            return
+        if line.get_marker() not in (None, "None", "", " "):
+            print("SVG export: skipping line markers")
+        color, alpha = svg_color(to_rgba(line.get_color(), line.get_alpha()))
+        opacity = f' stroke-opacity="{num(alpha)}"' if alpha < 1 else ""
+        coordinates = " ".join(f"{num(x)},{num(y)}" for x, y in points)
+        self.doc.body.append(f'<polyline points="{coordinates}" fill="none" stroke="{color}"{opacity} '
+                             f'stroke-width="{num(line.get_linewidth())}" stroke-linejoin="round"/>\n')
+        self.doc.extend(*points.min(axis=0), *points.max(axis=0), clip)
+
+    # Function to write a text as real <text> (one <tspan> per line), so it stays editable
+    def text(self, text):
+        from matplotlib.colors import to_rgba
+
+        content = text.get_text()
+        if not content:
+            return
+        (x, y), = self.to_svg(text.get_transform().transform([text.get_position()]))
+        size = text.get_fontsize()
+        lines = content.split("\n")
+        spacing = text.get_linespacing()
+        line_height = size * (spacing if isinstance(spacing, (int, float)) else 1.2)  # "normal" is about 1.2
+
+        # Baseline of the first line from the vertical alignment (ascent about 0.8 and descent 0.2 of the size)
+        valign = text.get_verticalalignment()
+        block = (len(lines) - 1) * line_height
+        first = {"top": y + 0.8 * size, "center": y - block / 2 + 0.3 * size, "bottom": y - block - 0.2 * size,
+                 "center_baseline": y - block / 2}.get(valign, y - block)
+        anchor = {"left": "start", "center": "middle", "right": "end"}[text.get_horizontalalignment()]
+        color, alpha = svg_color(to_rgba(text.get_color(), text.get_alpha()))
+        opacity = f' fill-opacity="{num(alpha)}"' if alpha < 1 else ""
+        rotation = f' transform="rotate({num(-text.get_rotation())} {num(x)} {num(y)})"' if text.get_rotation() else ""
+
+        spans = "".join(f'<tspan x="{num(x)}" y="{num(first + number * line_height)}">{escape(line)}</tspan>'
+                        for number, line in enumerate(lines))
+        family = quoteattr(", ".join(text.get_fontfamily()))
+        self.doc.body.append(f'<text font-family={family} font-size="{num(size)}" font-weight="{text.get_fontweight()}" '
+                             f'text-anchor="{anchor}" fill="{color}"{opacity}{rotation}>{spans}</text>\n')
+        width = max(len(line) for line in lines) * size * 0.6
+        left = {"start": x, "middle": x - width / 2, "end": x - width}[anchor]
+        self.doc.extend(left, first - 0.8 * size, left + width, first + block + 0.2 * size)
+
+    def patch(self, patch, clip):
+        path = patch.get_path()
+        points = self.to_svg(patch.get_transform().transform(path.vertices))
+        if len(points) == 0:
+            return
+        style = paint(patch.get_facecolor(), patch.get_edgecolor(), patch.get_linewidth())
+        width = f' stroke-width="{num(patch.get_linewidth())}"' if patch.get_linewidth() else ""
+        self.doc.body.append(f'<path d="{path_data(points, path.codes)}" {style}{width}/>\n')
+        self.doc.extend(*points.min(axis=0), *points.max(axis=0), clip)
+
+
+# Function to save a figure as an SVG with each repeated shape and image defined once and reused
+def save_svg(fig, output_path, transparent=False, tight=False, pad_inches=0.1, image_dpi=image_dpi):
+    """
+    Drop-in for fig.savefig(output_path, format="svg"), for figures with thousands of copies of the
+    same star, sparkle or icon: each is written as a <use> of one definition instead of in full.
+    Text is kept as <text> rather than turned into outlines.
+
+    :param transparent: Leave out the figure background
+    :param tight: Crop the page to what is drawn plus pad_inches, like bbox_inches='tight'
+    :param image_dpi: Resolution to resample embedded images to (they are never enlarged)
+    :return: Dict with the number of shapes and images defined and the number of <use> elements
+    """
+    doc = SvgExporter(fig, image_dpi).export()
+    doc.write(output_path, tight=tight, pad=pad_inches * 72, background=None if transparent else fig.get_facecolor())
+    return doc.stats()
@@ -0,0 +1,58 @@
+#python module to generate made up activity logs shaped like 24hour.csv, for benchmarks
+import numpy as np
+import pandas as pd
+
+from ingest import time_format
+
+# Descriptions to pick from, including the ones draw_timeline treats differently (sleep, car ride, walking)
+descriptions = [
+    "waking up", "car ride- passenger princess", "walking to the falls", "sleep", "breakfast at the hotel",
+    "dnd imersive experience", "playing arcade games", "mini golf", "getting ready for bed", "lunch by the river",
+]
+companions = ["With BF", "Alone"]
+energy_levels = ["low", "medium", "high"]
+
+
+# Function to generate a made up activity log with the same columns as 24hour.csv
+def generate_activity_log(num_rows, activity_types, max_types_per_row=2, rows_per_day=None, start="2/15/2025 12:30:00AM",
+                          rng=None):
+    """
+    :param num_rows: Number of activities to generate
+    :param activity_types: Activity types to pick from (e.g. the keys of activity_colors)
+    :param max_types_per_row: Most activity types tagged on one row ("eating, relaxing" is 2)
+    :param rows_per_day: Rows before moving on to the next day, or None to put every row in "Day 1"
+    :param start: Start time of the first activity
+    :param rng: numpy.random.Generator to draw from
+    :return: DataFrame with the raw csv columns (times as text, like the csv)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    activity_types = list(activity_types)
+
+    # Back to back activities lasting 10 minutes to 3 hours
+    minutes = rng.integers(10, 180, size=num_rows)
+    end = pd.Timestamp(start) + pd.to_timedelta(np.cumsum(minutes), unit="min")
+    begin = end - pd.to_timedelta(minutes, unit="min")
+
+    num_types = rng.integers(1, max(max_types_per_row, 1) + 1, size=num_rows)
+    types = [", ".join(rng.choice(activity_types, size=min(n, len(activity_types)), replace=False)) for n in num_types]
+
+    rows = np.arange(num_rows)
+    day = rows // rows_per_day + 1 if rows_per_day else np.ones(num_rows, dtype=int)
+
+    return pd.DataFrame({
+        "Day": [f"Day {n}" for n in day],
+        "Activity Type": types,
+        "Activity Description": rng.choice(descriptions, size=num_rows),
+        "Who Im with": rng.choice(companions, size=num_rows),
+        "Energy Level": rng.choice(energy_levels, size=num_rows),
+        "Start time": begin.strftime(time_format),
+        "end time": end.strftime(time_format),
+        "total time": [f"{m // 60}:{m % 60:02d}:00" for m in minutes],
+    })
+
+
+# Function to write a made up activity log to a csv file
+def write_activity_log(path, num_rows, activity_types, **kwargs):
+    generate_activity_log(num_rows, activity_types, **kwargs).to_csv(path, index=False)
+    return path
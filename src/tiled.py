@@ -0,0 +1,130 @@
+#python module to save a very large figure as a PNG one tile at a time
+import io
+import struct
+import zlib
+
+import numpy as np
+from matplotlib.text import Text
+from matplotlib.transforms import Bbox
+
+
+# Function to write one PNG chunk (length, type, data, crc)
+def write_chunk(file, chunk_type, data):
+    file.write(struct.pack(">I", len(data)))
+    file.write(chunk_type)
+    file.write(data)
+    file.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+
+# Function to pick a tile height so the strip of tiles being encoded fits in the memory budget
+def strip_height(width, memory_budget):
+    # The full width strip, its copy with the PNG filter bytes, the tile being rendered and Agg's own buffer
+    # are all alive at once
+    bytes_per_row = width * 4 * 4
+    return max(1, memory_budget // bytes_per_row)
+
+
+# Function to render one tile of the figure, given in pixels from the top left corner
+def render_tile(fig, dpi, height, left, top, right, bottom, transparent):
+    from matplotlib.image import AxesImage
+
+    tile_box = Bbox.from_extents(left / dpi, (height - bottom) / dpi, right / dpi, (height - top) / dpi)
+
+    # matplotlib resamples every image on each draw even when it is nowhere near the tile, so hide those
+    hidden = []
+    for image in fig.findobj(AxesImage):
+        extent = image.get_window_extent().transformed(fig.dpi_scale_trans.inverted())
+        if image.get_visible() and not extent.overlaps(tile_box):
+            image.set_visible(False)
+            hidden.append(image)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="raw", dpi=dpi, bbox_inches=tile_box, pad_inches=0, transparent=transparent)
+    finally:
+        for image in hidden:
+            image.set_visible(True)
+    return np.frombuffer(buffer.getbuffer(), dtype=np.uint8).reshape(bottom - top, right - left, 4)
+
+
+# Function to save the figure as a PNG without ever holding the whole raster in memory
+def save_tiled_png(fig, output_path, dpi=300, tile_size=None, memory_budget=512 * 1024 * 1024, transparent=True):
+    """
+    Renders the figure tile by tile and streams each finished strip of tiles into the PNG.
+
+    Peak memory for the raster is about memory_budget instead of width * height * 4 bytes
+    (21600 x 21600 x 4 = 1.8 GB for a 72 inch poster at 300 dpi). The images are first scaled down
+    to their size on the page (see pdfexport.page_sized_images) and those copies count towards the
+    budget too, otherwise every tile would resample each full size icon again. The decoded icons
+    themselves are already in memory for any render, and are not counted.
+
+    Every tile draws the whole figure clipped to the tile, so fewer, bigger tiles are faster:
+    by default a tile is as wide as the figure and as tall as what is left of the budget allows.
+
+    Text wrapping is turned off, because matplotlib wraps text at the edge of whatever is being
+    rendered, which would be the tile here (the activity descriptions are wrapped with textwrap already).
+
+    :param fig: Matplotlib figure to save
+    :param output_path: Path of the PNG file to write
+    :param dpi: Resolution of the output
+    :param tile_size: Maximum width and height of a tile (in pixels), None for full width strips
+    :param memory_budget: Memory to allow for the strip being encoded (in bytes)
+    :param transparent: Save with a transparent background, like savefig(transparent=True)
+    """
+    from pdfexport import page_sized_images
+
+    width = int(round(fig.get_figwidth() * dpi))
+    height = int(round(fig.get_figheight() * dpi))
+
+    for text in fig.findobj(Text):
+        text.set_wrap(False)
+
+    with page_sized_images(fig, dpi) as image_bytes:
+        tile_height = strip_height(width, max(memory_budget - image_bytes, 0))
+        tile_width = width
+        if tile_size is not None:
+            tile_width = tile_size
+            tile_height = min(tile_height, tile_size)
+        write_png(output_path, width, height, dpi, tile_strips(fig, dpi, width, height, tile_width, tile_height,
+                                                               transparent))
+
+
+# Function to render the figure one full width strip of tiles at a time
+def tile_strips(fig, dpi, width, height, tile_width, tile_height, transparent):
+    for top in range(0, height, tile_height):
+        bottom = min(top + tile_height, height)
+        strip = np.zeros((bottom - top, width, 4), dtype=np.uint8)
+        for left in range(0, width, tile_width):
+            right = min(left + tile_width, width)
+            strip[:, left:right] = render_tile(fig, dpi, height, left, top, right, bottom, transparent)
+        yield strip
+
+
+# Function to write a PNG from full width strips of RGBA pixels, compressing each strip as it arrives
+def write_png(output_path, width, height, dpi, strips, level=6):
+    """
+    :param output_path: Path of the PNG file to write
+    :param width, height: Size of the image in pixels
+    :param dpi: Resolution to record in the file
+    :param strips: Iterable of uint8 arrays of shape (rows, width, 4), top to bottom, adding up to height rows
+    :param level: zlib compression level
+    """
+    with open(output_path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        # 8 bit RGBA, no interlacing
+        write_chunk(file, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        pixels_per_meter = int(round(dpi / 0.0254))
+        write_chunk(file, b"pHYs", struct.pack(">IIB", pixels_per_meter, pixels_per_meter, 1))
+
+        compressor = zlib.compressobj(level)
+        for pixels in strips:
+            # Each row starts with the PNG filter type (0 = none)
+            strip = np.zeros((len(pixels), width * 4 + 1), dtype=np.uint8)
+            strip[:, 1:] = pixels.reshape(len(pixels), -1)
+
+            data = compressor.compress(strip)
+            if data:
+                write_chunk(file, b"IDAT", data)
+            del strip
+
+        write_chunk(file, b"IDAT", compressor.flush())
+        write_chunk(file, b"IEND", b"")
@@ -1,25 +1,22 @@
 #python script to create a timeline of activitys based on csv
-import pandas as pd
-import matplotlib.pyplot as plt
-from PIL import Image, ImageDraw, ImageFilter
-from matplotlib.patches import Polygon
-import matplotlib.patches as patches
-import matplotlib.image as mpimg
-from matplotlib.offsetbox import OffsetImage, AnnotationBbox
-import textwrap
+# matplotlib and pandas are only imported inside the functions that draw or read the csv,
+# so importing this module (e.g. for generate_spiral_path or create_star) stays cheap
+from PIL import Image
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from activities import Activities, alone_icon, with_bf_icon
+from assets import icon_cache
+from lod import detail, level_of_detail, lod_icon
+from plan import RenderPlan
+from profiling import format_summary, note, profiled, stage, start_profile, stop_profile
+from sparkles import draw_sparkle_trail
+from sprites import halo_sprite, mini_star_sprite
+from stars import StarBatch, star_vertices
 
 import numpy as np
 
-# Load the data from the CSV file
-df = pd.read_csv('24hour.csv')
-
-# Filter data to only include "Day 1"
-df = df[df['Day'] == 'Day 1']
-
-# Convert the 'Start time' and 'End time' columns to datetime
-df['Start time'] = pd.to_datetime(df['Start time'], format='%m/%d/%Y %I:%M:%S%p', errors='coerce')
-df['End time'] = pd.to_datetime(df['end time'], format='%m/%d/%Y %I:%M:%S%p', errors='coerce')
-
 # Define colors for different activity types with a rose gold theme
 activity_colors = {
     "relaxing": (255, 210, 220),    # Light Pink Shimmer (for relaxing)
@@ -30,6 +27,13 @@ activity_colors = {
     "clifton hill":(255, 140, 0) #strong orange
 }
 
+# Data limits of the timeline axis
+xlim = (-50, 150)
+ylim = (-50, 100)
+
+# Bursts only start once the spiral has developed a bit (rows before this index are left empty)
+first_burst = 7
+
 # Function to generate a spiral path with more space between the points
 # Function to generate a spiral path with more space between the points
 def generate_spiral_path(num_points, radius):
@@ -47,92 +51,83 @@ def generate_spiral_path(num_points, radius):
     return x_centered, y_centered
 
 
-# Function to create a mini shooting star icon with rose gold effect
-def create_mini_star(color, size=15, circle_size=200, line_width=3, tail_length=30):
-    img = Image.new('RGBA', (circle_size + tail_length, circle_size), (255, 255, 255, 0))
-    draw = ImageDraw.Draw(img)
-    
-    # Create a gradient rose gold effect for the circle (main body of the star)
-    gradient = Image.new('RGBA', (circle_size, circle_size), (0, 0, 0, 0))
-    gradient_draw = ImageDraw.Draw(gradient)
-    
-    # Draw a radial gradient (simulating a rose gold metallic shine effect)
-    for i in range(circle_size // 2, 0, -1):
-        shade = tuple(int(c * (i / (circle_size // 2))) for c in color)  # Apply gradient effect
-        gradient_draw.ellipse([i, i, circle_size - i, circle_size - i], outline=shade, width=line_width)
-    
-    # Apply the gradient to the circle
-    img.paste(gradient, (0, 0), gradient)
-    
-    # Draw the star (in the shape of a shooting star) in the center with the same rose gold tone
-    points = [
-        (circle_size * 0.5, 0), (circle_size * 0.6, circle_size * 0.35), (circle_size, circle_size * 0.35),
-        (circle_size * 0.7, circle_size * 0.6), (circle_size * 0.8, circle_size), (circle_size * 0.5, circle_size * 0.75),
-        (circle_size * 0.2, circle_size), (circle_size * 0.3, circle_size * 0.6), (0, circle_size * 0.35), (circle_size * 0.4, circle_size * 0.35)
-    ]
-    draw.polygon(points, fill=color)
-    
-    # Add the tail effect (simulating a shooting star)
-    tail_start = (circle_size * 0.9, circle_size * 0.5)  # Position at the right end of the star
-    tail_end = (circle_size + tail_length, circle_size * 0.5)  # Extend the tail to the right
+# Function to get the spot on the spiral for every row, with the hand tuned spiral or the arc length layout
+def layout_path(num_points, layout="spiral"):
+    """
+    :param layout: "spiral" for generate_spiral_path, or "arc" for points at equal arc length with
+                   overlapping activities nudged apart (see layout.arc_spiral_path)
+    """
+    if layout == "arc":
+        from layout import arc_spiral_path
+
+        return arc_spiral_path(num_points, 50, first=first_burst)
+    return generate_spiral_path(num_points, 50)
 
-    # Drawing the tail as a gradient (faded effect towards the end)
-    for i in range(tail_length):
-        opacity = int(255 * (1 - (i / tail_length)))  # Fade the tail
-        tail_color = color + (opacity,)  # Adding alpha value for transparency
-        draw.line([tail_start, (circle_size + i, circle_size * 0.5)], fill=tail_color, width=2)
-        tail_start = (circle_size + i, circle_size * 0.5)  # Update the tail start position
 
-    return img
+# Function to create a mini shooting star icon with rose gold effect
+# The sprite is built with numpy and cached, so each color is only drawn once per run
+def create_mini_star(color, size=15, circle_size=200, line_width=3, tail_length=30):
+    return mini_star_sprite(color, circle_size=circle_size, line_width=line_width, tail_length=tail_length)
 
 # Function to create a 5-point burst star
 def create_star(center_x, center_y, size, color='gold'):
-    angles = np.linspace(0, 2 * np.pi, 11)  # 10 points + closing point
-    radius_outer = size
-    radius_inner = size / 2.5
+    from matplotlib.patches import Polygon
 
-    star_points = []
-    for i, angle in enumerate(angles[:-1]):  # Skip last point to avoid duplication
-        radius = radius_outer if i % 2 == 0 else radius_inner
-        star_points.append((center_x + radius * np.cos(angle), center_y + radius * np.sin(angle)))
+    star_points = star_vertices(center_x, center_y, size)[0]  # 10 points, alternating outer and inner radius
 
     return Polygon(star_points, closed=True, facecolor=color, edgecolor='black', lw=1.5, zorder=3)
 
+# Function to add a burst star, either queued on a star batch or as its own patch
+def add_star(ax, center_x, center_y, size, color='gold', zorder=3, stars=None):
+    if stars is not None:
+        stars.add(center_x, center_y, size, color=color, zorder=zorder)
+    else:
+        star = create_star(center_x, center_y, size, color)
+        star.set_zorder(zorder)
+        ax.add_patch(star)
+
+# Function to add a small image (heart, companion icon) at a fixed on-page size,
+# either queued on a stamp batch or as its own AnnotationBbox
+def add_image_stamp(ax, image_path, x, y, zoom, stamps=None):
+    if stamps is not None:
+        stamps.add(image_path, x, y, zoom=zoom)
+    else:
+        from matplotlib.offsetbox import OffsetImage, AnnotationBbox
+
+        image, shrink = lod_icon(image_path)
+        imagebox = OffsetImage(image, zoom=zoom / shrink)
+        ax.add_artist(AnnotationBbox(imagebox, (x, y), frameon=False))
+
 # Function to create a sleep icon (e.g., a moon)# Function to create a sleep icon (use an existing image, e.g., sleep.png)
 # Function to create a sleep icon (use the original image, e.g., sleep.png)
+@profiled("icon load")
 def create_sleep_icon( ):
-    img = Image.open("icons/sleep.png")
-    
-    # Return the image without resizing
-    return img
+    # Return the image without resizing (decoded once and shared through the icon cache)
+    return lod_icon("icons/sleep.png")[0]
 
 # Function to create and resize carriage icon
+@profiled("icon load")
 def create_carriage():
-    img = Image.open("icons/carriage.png")
-    return img
+    return lod_icon("icons/carriage.png")[0]
 
 # Function to create and resize slipper/walking icon
+@profiled("icon load")
 def create_slipper():
-    img = Image.open("icons/glassslipper_walking.png")
-    return img
+    return lod_icon("icons/glassslipper_walking.png")[0]
 
+@profiled("icon load")
 def create_gamecontroler():
-    img = Image.open("icons/game controller.png")
-    return img
+    return lod_icon("icons/game controller.png")[0]
 # Function to create a physical fun icon (use the original image, e.g., sleep.png)
 
+@profiled("icon load")
 def create_physical_fun_icon():
-    img = Image.open("icons/female_mouse_physical.png")
-    new_size = (int(img.width * 1.5), int(img.height * 1.5))  # Increase size by 50%
-    img = img.resize(new_size, Image.Resampling.LANCZOS)
-    return img
+    return lod_icon("icons/female_mouse_physical.png", scale=1.5)[0]  # Increase size by 50%
 
 # Function to create a bigger mental fun icon
+@profiled("icon load")
 def create_mental_fun_icon():
-    img = Image.open("icons/mental_fun.png")
-    new_size = (int(img.width * 1.5), int(img.height * 1.5))  # Increase size by 50%
-    img = img.resize(new_size, Image.Resampling.LANCZOS)
-    return img
+    return lod_icon("icons/mental_fun.png", scale=1.5)[0]  # Increase size by 50%
 
 # Function to create a silver star (same as the golden star but with a silver color)
 def create_silver_star(center_x, center_y, size, color='silver'):
@@ -144,33 +139,30 @@ def create_blue_star(center_x, center_y, size, color='#73a9c2'):
     return create_star(center_x, center_y, size, color)
 
 # Function to add energy level-based stars in the timeline
-def add_energy_stars(ax, x, y, energy_level, index):
+def add_energy_stars(ax, x, y, num_hearts, index, stars=None, stamps=None):
     """
     Replaces energy stars with a silver star containing up to 3 hearts.
     :param ax: Matplotlib axis
     :param x, y: Position
-    :param energy_level: 'high', 'medium', 'low'
+    :param num_hearts: 3, 2 or 1 for a 'high', 'medium' or 'low' energy level (see Activities.hearts)
     :param index: Index in timeline
-    :param heart_img_path: Path to heart image
+    :param stars: StarBatch to queue the silver star on (added as its own patch if None)
+    :param stamps: StampBatch to queue the hearts on (added as AnnotationBboxes if None)
     """
     
     # Silver star to hold hearts
-    silver_star = create_silver_star(x - 3, y + 2, size=5, color='silver')
-    silver_star.set_zorder(0)
-    ax.add_patch(silver_star)
-
-    # Load heart image
-    heart_img = mpimg.imread('icons/heart.png')
-    heart_icon = OffsetImage(heart_img, zoom=.5)  # Adjust zoom as needed
-
-    # Determine number of hearts based on energy level
-    num_hearts = {"high": 3, "medium": 2, "low": 1}[energy_level]
+    add_star(ax, x - 3, y + 2, size=5, color='silver', zorder=0, stars=stars)
 
     # Place hearts inside the silver star
     for i in range(num_hearts):
         offset_x = x - 3 + (i - (num_hearts - 1) / 2) * 1.5  # Space hearts evenly
-        heart_box = AnnotationBbox(heart_icon, (offset_x, y +2), frameon=False)
-        ax.add_artist(heart_box)
+        add_image_stamp(ax, 'icons/heart.png', offset_x, y + 2, zoom=.5, stamps=stamps)  # Adjust zoom as needed
+# Function to pick the companionship icon
+def who_im_with_icon(who_im_with):
+    if who_im_with == "Alone":
+        return alone_icon
+    return with_bf_icon
+
 def create_who_im_with(who_im_with, x, y):
     """
     Creates an image-based icon for companionship and returns an AnnotationBbox.
@@ -179,68 +171,71 @@ def create_who_im_with(who_im_with, x, y):
     :param x, y: Position where the image should be placed.
     :return: AnnotationBbox containing the image.
     """
-    # Load the correct image
-    if who_im_with == "Alone":
-        image_path = "icons/cinderella-alone.png"
-    else:
-        image_path = "icons/cinderella-with bf.png"
+    from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 
-    # Load and create OffsetImage
-    img = mpimg.imread(image_path)
-    imagebox = OffsetImage(img, zoom=.25)  # Adjust zoom to fit properly
+    # Load the correct image (decoded once through the icon cache) and create OffsetImage
+    img, shrink = lod_icon(who_im_with_icon(who_im_with))
+    imagebox = OffsetImage(img, zoom=.25 / shrink)  # Adjust zoom to fit properly
 
     # Create annotation box to place it on the plot
     ab = AnnotationBbox(imagebox, (x, y), frameon=False)
     
     return ab
-def add_who_im_with(ax, x, y, who_im_with, index):
+def add_who_im_with(ax, x, y, icon_path, index, stars=None, stamps=None):
     """
     Adds a blue star containing an image representing companionship.
 
     :param ax: Matplotlib axis
     :param x, y: Position
-    :param who_im_with: "alone" or "with bf"
+    :param icon_path: Companionship icon, see who_im_with_icon
     :param index: Index in the timeline
+    :param stars: StarBatch to queue the blue star on (added as its own patch if None)
+    :param stamps: StampBatch to queue the icon on (added as an AnnotationBbox if None)
     """
     # Offset the blue star to be slightly to the upper left of the silver star
     blue_star_x = x - 5 # Move left
     blue_star_y = y + 5 # Move up
 
     # Create a blue star to hold the icon
-    blue_star = create_blue_star(blue_star_x, blue_star_y, size=5)
-    blue_star.set_zorder(-1)  # Background layer
-    ax.add_patch(blue_star)
+    add_star(ax, blue_star_x, blue_star_y, size=5, color='#73a9c2', zorder=-1, stars=stars)  # Background layer
 
-    # Get the "who I'm with" image as an AnnotationBbox
-    ab = create_who_im_with(who_im_with, blue_star_x, blue_star_y)
-    ax.add_artist(ab)  # Add the image annotation to the axis
+    # Add the "who I'm with" image on top of the blue star
+    add_image_stamp(ax, icon_path, blue_star_x, blue_star_y, zoom=.25, stamps=stamps)
     
     
-def add_starttime(ax, x, y, start_time, index):
-    burst_star = create_star(x, y - 15, size=9)  # Decreased size and adjusted position
-    burst_star.set_zorder(0)  # Set zorder to 0 to place it behind other elements
-    ax.add_patch(burst_star)
+def add_starttime(ax, x, y, start_label, index, stars=None):
+    # Decreased size and adjusted position, zorder 0 to place it behind other elements
+    add_star(ax, x, y - 15, size=9, zorder=0, stars=stars)
+
+    # Add the text with the start time inside the burst star (left out of thumbnails)
+    if detail("text"):
+        ax.text(x, y - 15.5, start_label, ha='center', va='center', fontweight='bold', fontsize=6, color='black')
 
-    # Add the text with the start time inside the burst star
-    ax.text(x, y - 15.5, start_time.strftime("%I:%M %p"), ha='center', va='center', fontweight='bold', fontsize=6, color='black')
 
 
+# Function to make the figure and the axis every part of the timeline is drawn on
+def setup_axes(figsize=(72, 72), fig=None):
+    if fig is None:
+        import matplotlib.pyplot as plt
 
-def draw_timeline(df, activity_colors):
-    fig, ax = plt.subplots(figsize=(72,72))  # Set the figure size to 36 by 24
-    ax.set_xlim(-50, 150)
-    ax.set_ylim(-50,100)
+        fig, ax = plt.subplots(figsize=figsize)  # Set the figure size to 72 by 72
+    else:
+        # Draw onto a figure handed over by a batch render (already cleared and sized)
+        ax = fig.add_subplot()
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
     ax.axis('off')
+    return fig, ax
 
-    # Generate a larger spiral path with more space between activities
-    x, y = generate_spiral_path(len(df), 50)
 
+# Function to draw the magic wand at the start of the spiral (x, y)
+def draw_wand(ax, x, y):
     try:
         magic_wand = Image.open("icons/bigger_wand_withstart.png")
 
         # Resize the image (increase the width and height to make it larger)
-        new_width = 500  # Increase the width to make it larger
-        new_height = 500  # Increase the height to make it larger
+        new_width = detail("wand_pixels")  # 500 for print, smaller for drafts and thumbnails
+        new_height = detail("wand_pixels")
         resized_wand = magic_wand.resize((new_width, new_height), Image.Resampling.LANCZOS)
 
         # Rotate the resized image if necessary
@@ -249,175 +244,504 @@ def draw_timeline(df, activity_colors):
         # Adjust the x and y-axis extents to move the image
         x_offset = 5  # Adjust this value to move the image left or right
         y_offset = 0  # Adjust this value to move the image up or down
-        
-        ax.imshow(rotated_wand, extent=[x[0] - 10 + x_offset, x[0] + 10 + x_offset, y[0] - 20 + y_offset, y[0] + 20 + y_offset], aspect='auto')
+    
+        ax.imshow(rotated_wand, extent=[x - 10 + x_offset, x + 10 + x_offset, y - 20 + y_offset, y + 20 + y_offset], aspect='auto')
 
-        
-      
     except FileNotFoundError:
         print("Magic wand image not found!")
 
-  
-
-    # For storing the connection between bursts and text
-    activity_positions = []
-
-    # Label burst count
-    burst_counter = 1
-
-    # We will start the bursts after the first full rotation, or after a certain index
-    burst_started = False
-
-    for index, row in df.iterrows():
-        start_time, end_time = row['Start time'], row['End time']
-        activity_types = row['Activity Type'].split(', ')  # Handle multiple activity types
-        color = activity_colors.get(activity_types[0], (255, 255, 255, 255))
-
-        if burst_started:
-            num_stars = len(activity_types)
-            energy_level = row['Energy Level']  # Assuming energy level is in the dataset
-            who_im_with = row['Who Im with']
- 
-            for i in range(num_stars):
-                color = activity_colors.get(activity_types[i], (255, 255, 255, 255))
-                   # Now, call the function to add energy level stars
-                add_energy_stars(ax, x[index], y[index], energy_level, index)
-                # call who im with
-                add_who_im_with(ax, x[index], y[index],who_im_with, index)
-                 # Draw the burst gold star (yellow with an orange outline)
-                add_starttime(ax, x[index], y[index], start_time, index)
-                
-                if activity_types[i] == "sleep":
-                    # Create burst star for travel activities
-                    sleep_star = create_star(x[index]-1, y[index] - 3, size=7)
-                    sleep_star.set_zorder(0)  # Place behind other elements
-                    ax.add_patch(sleep_star)
-                    sleep_icon = create_sleep_icon()
-                    x_offset = (i - (num_stars // 2)) * 2
-                    ax.imshow(sleep_icon, extent=[x[index] + x_offset - 3, x[index] + x_offset + 1, y[index] - 5, y[index] -1], aspect='auto')
-
-                elif activity_types[i] == "travel":
-                    activity_description = row['Activity Description'].lower()
-
-                    # Create burst star for travel activities
-                    travel_star = create_star(x[index], y[index] - 4, size=7)
-                    travel_star.set_zorder(0)  # Place behind other elements
-                    ax.add_patch(travel_star)
-
-                    # Choose travel icon
-                    if "car ride" in activity_description:
-                        travel_icon = create_carriage()
-                    else:
-                        travel_icon = create_slipper()
-
-                    ax.imshow(travel_icon, extent=[x[index] - 1.5, x[index] + 1.5, y[index] - 5, y[index] - 2], aspect='auto', zorder=1)
-                elif activity_types[i] in ["physical-fun"]:
-                  
-                        fun_icon = create_physical_fun_icon()
-                        x_offset = (i - (num_stars // 2)) * 2-4   # Move further left
-                        y_offset = -8  # Slight downward shift for better positioning
-                    
-                    # Plot the stars first, then overlay the physical activity icon
-                        ax.imshow(fun_icon, extent=[x[index] + x_offset - 2, 
-                                                            x[index] + x_offset + 2, 
-                                                            y[index] + y_offset - 2, 
-                                                            y[index] + y_offset + 2], aspect='auto', zorder=3)  # Ensure it's on top
-
-                elif activity_types[i] in ["mental- fun"]:
-                    
-                        fun_icon = create_mental_fun_icon()
-                        x_offset = (i - (num_stars // 2)) * 2 +8  # Move further right
-                        y_offset = -4.5  # Slight downward shift for better positioning
-                    
-                    # Plot the stars first, then overlay the physical activity icon
-                        ax.imshow(fun_icon, extent=[x[index] + x_offset - 2, 
-                                                            x[index] + x_offset + 2, 
-                                                            y[index] + y_offset - 2, 
-                                                            y[index] + y_offset + 2], aspect='auto', zorder=3)  # Ensure it's on top
-
-                elif activity_types[i] in ["gaming"]:
-                        fun_icon = create_gamecontroler()
-                        x_offset = (i - (num_stars // 2)) * 2.3  # Move further left
-                        y_offset = - 10 # Slight downward shift for better positioning
-                    
-                    # Plot the stars first, then overlay the physical activity icon
-                        ax.imshow(fun_icon, extent=[x[index] + x_offset - 2, 
-                                                            x[index] + x_offset + 2, 
-                                                            y[index] + y_offset - 2, 
-                                                            y[index] + y_offset + 2], aspect='auto', zorder=3)  # Ensure it's on top
-                        
-            # Check if the activity type has a corresponding color before creating mini stars
-                if activity_types[i] in activity_colors:
-                    mini_star_icon = create_mini_star(color, size=2, circle_size=60, line_width=5)
-                    x_offset = (i - (num_stars // 2)) * 2  # Spread the stars apart
-                    num_mini_stars = 150  # Number of mini stars around the outline
-                    angle = np.linspace(0, 2 * np.pi, num_mini_stars, endpoint=False)  # Full circle
-                    
-                    for j in range(num_mini_stars):
-                        # Calculate positions for mini stars around the burst star's position
-                        radius = 10  # Radius around the burst star
-                        x_pos = x[index] + radius * np.cos(angle[j]) + x_offset
-                        y_pos = y[index] - 5 + radius * np.sin(angle[j]) + 2  # Adjust vertical offset as needed
-                        
-                        # Place the mini stars around the burst star
-                        ax.imshow(mini_star_icon, extent=[x_pos - 1, x_pos + 1, y_pos - 1, y_pos + 1], aspect='auto', zorder=-1)
-          
-            
-            # Store activity positions for connection (x and y coordinates)
-            activity_positions.append((x[index], y[index]))
-
-        
-            # Function to wrap text to fit within the star
-            def wrap_text(text, width=10):
-                return textwrap.fill(text, width=width)
-
-            # Loop through your dataset and process each activity
-            activity_description = row['Activity Description']
-
-            # Check if the activity description contains "sleep" or "car ride"
-            if "sleep" not in activity_description.lower() and "car ride" not in activity_description.lower() and "walking" not in activity_description.lower():
-                # Create the burst star (adjusted position) for activities that aren't "sleep" or "car ride"
-                burst_star = create_star(x[index], y[index] - 4, size=12)  # Decreased size and adjusted position
-                burst_star.set_zorder(0)  # Set zorder to 0 to place it behind other elements
-                ax.add_patch(burst_star)
-
-                # Wrap the activity description text to fit within the star
-                wrapped_description = wrap_text(activity_description)
-
-                # Display the wrapped text
-                ax.text(x[index], y[index] - 4, wrapped_description, ha='center', va='center', fontsize=8, color='black', weight='bold', wrap=True, zorder=1)
-
-                burst_counter += 1
-            else:
-                # For "sleep" or "car ride", still count the spot in the spiral but don't create the burst star or display the text
-                burst_counter += 1
-                
-          
 
+# Function to draw the icon for one of the activity types of a row (the i-th of num_stars)
+def add_activity_icon(ax, activity_type, i, num_stars, x, y, car_ride, stars=None):
+    if activity_type == "sleep":
+        # Create burst star for travel activities
+        add_star(ax, x-1, y - 3, size=7, zorder=0, stars=stars)  # Place behind other elements
+        sleep_icon = create_sleep_icon()
+        x_offset = (i - (num_stars // 2)) * 2
+        ax.imshow(sleep_icon, extent=[x + x_offset - 3, x + x_offset + 1, y - 5, y -1], aspect='auto')
+
+    elif activity_type == "travel":
+        # Create burst star for travel activities
+        add_star(ax, x, y - 4, size=7, zorder=0, stars=stars)  # Place behind other elements
 
+        # Choose travel icon
+        if car_ride:
+            travel_icon = create_carriage()
         else:
-            # Only start the bursts after the first full rotation, or after a certain index
-            if index > 5:  # After the spiral has developed a bit
-                burst_started = True
+            travel_icon = create_slipper()
+
+        ax.imshow(travel_icon, extent=[x - 1.5, x + 1.5, y - 5, y - 2], aspect='auto', zorder=1)
+    elif activity_type in ["physical-fun"]:
+
+            fun_icon = create_physical_fun_icon()
+            x_offset = (i - (num_stars // 2)) * 2-4   # Move further left
+            y_offset = -8  # Slight downward shift for better positioning
+
+        # Plot the stars first, then overlay the physical activity icon
+            ax.imshow(fun_icon, extent=[x + x_offset - 2,
+                                                x + x_offset + 2,
+                                                y + y_offset - 2,
+                                                y + y_offset + 2], aspect='auto', zorder=3)  # Ensure it's on top
+
+    elif activity_type in ["mental- fun"]:
+
+            fun_icon = create_mental_fun_icon()
+            x_offset = (i - (num_stars // 2)) * 2 +8  # Move further right
+            y_offset = -4.5  # Slight downward shift for better positioning
+
+        # Plot the stars first, then overlay the physical activity icon
+            ax.imshow(fun_icon, extent=[x + x_offset - 2,
+                                                x + x_offset + 2,
+                                                y + y_offset - 2,
+                                                y + y_offset + 2], aspect='auto', zorder=3)  # Ensure it's on top
+
+    elif activity_type in ["gaming"]:
+            fun_icon = create_gamecontroler()
+            x_offset = (i - (num_stars // 2)) * 2.3  # Move further left
+            y_offset = - 10 # Slight downward shift for better positioning
+
+        # Plot the stars first, then overlay the physical activity icon
+            ax.imshow(fun_icon, extent=[x + x_offset - 2,
+                                                x + x_offset + 2,
+                                                y + y_offset - 2,
+                                                y + y_offset + 2], aspect='auto', zorder=3)  # Ensure it's on top
+
+
+# Function to draw the ring of mini stars in an activity type's color, centered on (halo_x, halo_y)
+def add_halo(ax, halo_x, halo_y, color):
+    num_mini_stars = detail("mini_stars")  # Number of mini stars around the outline (150 for print)
+    radius = 10  # Radius around the burst star
+    circle_size = detail("mini_star_pixels")  # 60 for print
+
+    # The whole ring of mini stars is blended into one image, so it only takes one imshow
+    halo_icon = halo_sprite(color, radius=radius, num_mini_stars=num_mini_stars, star_size=2, circle_size=circle_size,
+                            line_width=max(1, round(circle_size / 12)))
+    half_extent = radius + 1  # Ring radius plus half a mini star
+    ax.imshow(halo_icon, extent=[halo_x - half_extent, halo_x + half_extent, halo_y - half_extent, halo_y + half_extent], aspect='auto', zorder=-1)
 
-        # Add sparkle trail between activities
-        if index < len(df) - 1:
-            num_sparkles = 200
-            x_sparkles = np.linspace(x[index], x[index + 1], num_sparkles)
-            y_sparkles = np.linspace(y[index], y[index + 1], num_sparkles)
-            x_sparkles += np.random.uniform(-0.3, 0.3, size=num_sparkles)
-            y_sparkles += np.random.uniform(-0.3, 0.3, size=num_sparkles)
-            sizes = np.random.rand(num_sparkles) * 15
-            colors = np.random.rand(num_sparkles)
-            ax.scatter(x_sparkles, y_sparkles, s=sizes, c=colors, marker='*', cmap='cividis', alpha=0.9, zorder=-1)
 
+# Function to draw the burst star with the wrapped activity description in it
+def add_description(ax, x, y, wrapped_description, stars=None):
+    # Decreased size and adjusted position, zorder 0 to place it behind other elements
+    add_star(ax, x, y - 4, size=12, zorder=0, stars=stars)
 
- 
+    # Display the description, already wrapped to fit within the star (left out of thumbnails)
+    if detail("text"):
+        ax.text(x, y - 4, wrapped_description, ha='center', va='center', fontsize=8, color='black', weight='bold', wrap=True, zorder=1)
+
+
+# Function to queue the draw commands for activity row index (of the prepared Activities) at its spot (x, y) on the spiral
+def plan_activity(plan, activities, x, y, index, activity_colors, stars=None, stamps=None):
+    """
+    Nothing is drawn here, the commands go on the RenderPlan, which drops the ones that repeat an
+    identical command (the silver star, hearts, blue star and start time are the same for every
+    activity type of a row, so they are only kept for the first).
+    """
+    activity_types = activities.types[index]  # Handle multiple activity types
+    num_stars = activities.num_types[index]
+
+    for i in range(num_stars):
+        activity_type = activity_types[i]
+        # Now, call the function to add energy level stars
+        plan.add("energy stars", add_energy_stars, x, y, activities.hearts[index], index, stars, stamps,
+                 activity_type=activity_type)
+        # call who im with
+        plan.add("who im with", add_who_im_with, x, y, activities.companion_icons[index], index, stars, stamps,
+                 activity_type=activity_type)
+        # Draw the burst gold star (yellow with an orange outline)
+        plan.add("start time", add_starttime, x, y, activities.start_labels[index], index, stars,
+                 activity_type=activity_type)
+
+        plan.add("activity icon", add_activity_icon, activity_type, i, num_stars, x, y, bool(activities.car_ride[index]),
+                 stars, activity_type=activity_type)
+
+        # Check if the activity type has a corresponding color before creating mini stars
+        if activity_type in activity_colors:
+            x_offset = (i - (num_stars // 2)) * 2  # Spread the stars apart
+            halo_y = y - 5 + 2  # Adjust vertical offset as needed
+            plan.add("halo", add_halo, x + x_offset, halo_y, activity_colors[activity_type], activity_type=activity_type)
+
+    # Only activities whose description doesn't mention "sleep", "car ride" or "walking" get one
+    if activities.show_description[index]:
+        plan.add("description", add_description, x, y, activities.wrapped[index], stars)
+
+
+# Function to draw every artist for activity row index (of the prepared Activities) at its spot (x, y) on the spiral
+def draw_activity(ax, activities, x, y, index, activity_colors, stars=None, stamps=None):
+    plan = RenderPlan()
+    plan_activity(plan, activities, x, y, index, activity_colors, stars, stamps)
+    plan.draw(ax)
+    return plan
+
+
+# Function to lay out the timeline and create all of its artists, without saving it
+def build_timeline(df, activity_colors, rng=None, figsize=(72, 72), fig=None, layout="spiral", scene=None):
+    from stamps import StampBatch
+
+    fig, ax = setup_axes(figsize, fig)
+
+    # All burst stars are queued here and drawn as one collection per zorder
+    stars = StarBatch(ax)
+
+    # Hearts and companion icons are decoded once and each drawn by a single artist
+    stamps = StampBatch(ax)
+
+    if scene is None:
+        draw_layers(ax, df, activity_colors, stars, stamps, rng=rng, layout=layout)
+    else:
+        # Already laid out, only the artists are left to make
+        scene.render(ax, stars, stamps)
+    return fig
+
+
+# Function to draw the wand, every activity and the sparkle trail onto an axis (a matplotlib one or a RasterAxes)
+def draw_layers(ax, df, activity_colors, stars, stamps, rng=None, layout="spiral"):
+    # Generate a larger spiral path with more space between activities
+    with stage("layout"):
+        x, y = layout_path(len(df), layout)
+
+    with stage("wand", ax):
+        draw_wand(ax, x[0], y[0])
+
+    # Types, hearts, labels and description checks for every row, worked out once before drawing
+    with stage("prepare"):
+        activities = Activities(df, first_burst)
+
+    # Every row's draw commands are queued first, so repeats of the same command are dropped before drawing
+    plan = RenderPlan()
+    with stage("plan"):
+        # Only start the bursts after the spiral has developed a bit
+        for index in activities.drawn:
+            plan_activity(plan, activities, x[index], y[index], index, activity_colors, stars, stamps)
+    note("render plan", plan.stats())
+    plan.draw(ax)
+
+    # Add sparkle trail between activities (all segments in one scatter)
+    with stage("sparkle trail", ax):
+        draw_sparkle_trail(ax, x, y, density=detail("sparkle_density"), jitter=0.3, max_size=15, rng=rng)
+
+    # Fill in the queued burst stars
+    with stage("star flush", ax):
+        stars.flush()
+
+
+def draw_timeline(df, activity_colors, rng=None, output_path="timeline_visualization.png", show=True, tile_memory=None,
+                  dpi=300, figsize=(72, 72), figure=None, layout="spiral", backend="matplotlib", lod=None, scene=None):
+    """
+    :param df: Activity rows to lay out, or None when drawing a scene
+    :param output_path: PNG to write, or an .svg/.pdf path for a vector file with each repeated image written once
+    :param figure: ReusableFigure to draw on (headless, never shown), or None for a new pyplot figure
+    :param layout: "spiral" or "arc", see layout_path
+    :param backend: "matplotlib", or "raster" to draw the PNG straight onto a PIL canvas (never shown)
+    :param lod: Level of detail ("thumbnail", "draft" or "print"), or None to pick it from dpi and figsize
+    :param scene: Scene laid out by scene.layout_scene (or loaded from a file) to draw instead of df, with its own
+                  figure size and level of detail
+    """
+    if scene is not None:
+        figsize, lod = scene.figsize, scene.lod
+
+    if backend == "raster":
+        from raster import RasterAxes, RasterStampBatch, RasterStarBatch
+
+        if not output_path.lower().endswith(".png"):
+            raise ValueError(f"The raster backend only writes PNG files, use the matplotlib backend for {output_path}")
+        if tile_memory is not None:
+            raise ValueError("The raster backend draws onto one full size canvas, use the matplotlib backend to render "
+                             "in tiles")
+
+        ax = RasterAxes(figsize, dpi, xlim, ylim)
+        # The stamps pick their icons when the canvas is drawn, so saving is inside the profile too
+        with level_of_detail(lod, dpi, figsize):
+            if scene is None:
+                draw_layers(ax, df, activity_colors, RasterStarBatch(ax), RasterStampBatch(ax), rng=rng, layout=layout)
+            else:
+                scene.render(ax, RasterStarBatch(ax), RasterStampBatch(ax))
+            with stage("savefig"):
+                ax.save_png(output_path)
+        note("icon cache", icon_cache.stats())
+        return
+
+    from tiled import save_tiled_png
+
+    # Sprite counts, sprite resolution and sparkle density to suit the size of the output
+    with level_of_detail(lod, dpi, figsize):
+        fig = build_timeline(df, activity_colors, rng=rng, figsize=figsize,
+                             fig=None if figure is None else figure.take(figsize), layout=layout, scene=scene)
 
    # Save the plot as a high-definition PNG with a transparent background
-    plt.savefig("timeline_visualization.png", format="png", dpi=300, transparent=True)
+    with stage("savefig"):
+        if output_path.lower().endswith(".svg"):
+            from svgexport import save_svg
+
+            # Repeated stars, sparkles and icons are written once and reused
+            note("svg", save_svg(fig, output_path, transparent=True))
+        elif output_path.lower().endswith(".pdf"):
+            from pdfexport import save_pdf
+
+            # Each distinct halo and icon image is embedded once, at dpi
+            note("pdf", save_pdf(fig, output_path, dpi=dpi, transparent=True))
+        elif tile_memory is not None:
+            # Render tile by tile so the full raster never has to fit in memory
+            save_tiled_png(fig, output_path, dpi=dpi, memory_budget=tile_memory, transparent=True)
+        else:
+            fig.savefig(output_path, format="png", dpi=dpi, transparent=True)
+    note("icon cache", icon_cache.stats())
+    if figure is not None:
+        # Drop this render's artists now, the figure itself is kept for the next one
+        figure.clear()
+        return
+
+    import matplotlib.pyplot as plt
+
         # Show the plot
-    plt.show()
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+# Function to turn a day name into something safe for a file name ("Day 1" -> "day_1")
+def day_slug(day):
+    return "_".join(str(day).lower().split())
+
+
+# Figure reused by every day a worker process draws (made by its first render_day)
+worker_figure = None
+
+
+# Function to draw one day without opening a window (run in each worker process, or in a loop by render_batch)
+def render_day(day, day_df, output_path, seed=None, tile_memory=None, profile=False, layout="spiral",
+               backend="matplotlib", lod=None, dpi=300, figure=None):
+    global worker_figure
+    from headless import ReusableFigure
+
+    if figure is None and backend == "matplotlib":
+        if worker_figure is None:
+            worker_figure = ReusableFigure()
+        figure = worker_figure
+    rng = np.random.default_rng(seed)
+    if profile:
+        start_profile()
+    draw_timeline(day_df, activity_colors, rng=rng, output_path=output_path, show=False, tile_memory=tile_memory,
+                  dpi=dpi, figure=figure, layout=layout, backend=backend, lod=lod)
+    report = stop_profile().report() if profile else None
+    return day, output_path, report
+
+
+# Function to get the render_day arguments for every day in the frame
+def split_days(df, output_pattern, seed=None, tile_memory=None, profile=False, layout="spiral", backend="matplotlib",
+               lod=None, dpi=300):
+    days = []
+    for day_index, (day, day_df) in enumerate(df.groupby('Day', observed=True, sort=False)):
+        # Each day is numbered from 0 so the index lines up with its own spiral
+        day_seed = None if seed is None else [seed, day_index]
+        days.append((day, day_df.reset_index(drop=True), output_pattern.format(day=day_slug(day)), day_seed, tile_memory,
+                     profile, layout, backend, lod, dpi))
+    return days
+
+
+# Function to draw several days one after another in this process, all on the same headless figure
+def render_batch(df, output_pattern="timeline_{day}.png", seed=None, tile_memory=None, profiles=None, layout="spiral",
+                 backend="matplotlib", lod=None, dpi=300):
+    """
+    Same as render_days, but without worker processes: one Agg figure is cleared and reused for
+    every day, and released at the end, so memory stays flat however many days there are.
 
-# Draw the timeline
-draw_timeline(df, activity_colors)
+    :return: Dict of day -> output path
+    """
+    from headless import ReusableFigure, use_agg
+
+    use_agg()
+    figure = ReusableFigure()
+    outputs = {}
+    try:
+        for args in split_days(df, output_pattern, seed, tile_memory, profiles is not None, layout, backend, lod, dpi):
+            day, output_path, report = render_day(*args, figure=figure)
+            outputs[day] = output_path
+            if profiles is not None:
+                profiles[day] = report
+            print(f"{day} saved to {output_path}")
+    finally:
+        figure.release()
+    return outputs
+
+
+# Function to draw several days at once, one worker process per day
+def render_days(df, output_pattern="timeline_{day}.png", workers=None, seed=None, tile_memory=None, profiles=None,
+                layout="spiral", backend="matplotlib", lod=None, dpi=300):
+    """
+    Splits the frame by 'Day' and draws every day in its own process.
+
+    :param df: Activity log with the days to draw (e.g. from load_days)
+    :param output_pattern: Output path for each day, {day} is replaced by the day name (e.g. day_1)
+    :param workers: Number of worker processes (defaults to the number of CPUs)
+    :param seed: Seed for the sparkle trails, so renders can be reproduced
+    :param tile_memory: Memory budget per worker for tiled rendering (in bytes), or None to render in one go
+    :param profiles: Dict to fill with the render profile of each day, or None to render without profiling
+    :param layout: "spiral" or "arc", see layout_path
+    :param backend: "matplotlib" or "raster", see draw_timeline
+    :param lod: Level of detail, see draw_timeline
+    :param dpi: Resolution of each PNG (and of the images in a PDF)
+    :return: Dict of day -> output path
+    """
+    days = split_days(df, output_pattern, seed, tile_memory, profiles is not None, layout, backend, lod, dpi)
+
+    outputs = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_day, *args) for args in days]
+        for future in futures:
+            day, output_path, report = future.result()
+            outputs[day] = output_path
+            if profiles is not None:
+                profiles[day] = report
+            print(f"{day} saved to {output_path}")
+    return outputs
+
+
+# Function to run the script from the command line (also used by "python src timeline")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Draw the activity timeline from the csv log")
+    parser.add_argument("--csv", default="24hour.csv", help="Activity log to read")
+    parser.add_argument("--day", action="append", dest="days", help="Day to draw, can be repeated (default: Day 1)")
+    parser.add_argument("--all-days", action="store_true", help="Draw every day in the log")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes for multiple days")
+    parser.add_argument("--output", default=None,
+                        help="Output path (.png, or .svg/.pdf for a vector file), for multiple days {day} is replaced "
+                             "by the day (default: timeline_{day}.png)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the sparkle trails")
+    parser.add_argument("--tile-memory", type=int, default=None,
+                        help="Render the PNG in tiles using at most this many MB for the raster")
+    parser.add_argument("--headless", action="store_true",
+                        help="Never open a window: use the Agg backend, and without --workers draw every day on "
+                             "one reused figure in this process")
+    parser.add_argument("--layout", choices=["spiral", "arc"], default="spiral",
+                        help="spiral: the hand tuned spiral, arc: activities spaced evenly along it and nudged apart "
+                             "where they would overlap")
+    parser.add_argument("--backend", choices=["matplotlib", "raster"], default="matplotlib",
+                        help="raster: draw the PNG straight onto a PIL canvas instead of through matplotlib "
+                             "(much faster at full size, never opens a window)")
+    parser.add_argument("--dpi", type=int, default=300, help="Resolution of the PNG (and of the images in a PDF)")
+    parser.add_argument("--lod", choices=["auto", "thumbnail", "draft", "print"], default="auto",
+                        help="Level of detail: fewer mini stars and sparkles and smaller sprites for small outputs "
+                             "(auto picks it from --dpi and the figure size)")
+    parser.add_argument("--incremental", nargs="?", const=".timeline_cache", default=None, metavar="CACHE_DIR",
+                        help="Only redraw the activities that changed since the last run, keeping the rest in CACHE_DIR "
+                             "(the sparkle trail uses --seed, or 0, so it can be cached too)")
+    # A loaded scene is already laid out, so there is nothing new to save
+    scene_options = parser.add_mutually_exclusive_group()
+    scene_options.add_argument("--save-scene", default=None, metavar="NPZ",
+                               help="Also save the laid out day as a scene file, which --scene can draw again at any "
+                                    "size or format without laying it out")
+    scene_options.add_argument("--scene", default=None, metavar="NPZ",
+                               help="Draw a scene saved with --save-scene instead of reading the csv")
+    parser.add_argument("--profile", nargs="?", const="-", default=None, metavar="JSON",
+                        help="Time each stage of the render, print a summary or save it to the given JSON file")
+    args = parser.parse_args(argv)
+
+    if args.dpi <= 0:
+        parser.error("--dpi must be a positive number of pixels per inch")
+
+    if args.backend == "raster":
+        # The raster backend writes PNG only, onto one full size canvas (1.8 GB at 72 inches and 300 dpi)
+        if args.output and not args.output.lower().endswith(".png"):
+            parser.error("--backend raster only writes .png files, use the matplotlib backend for .svg/.pdf")
+        if args.tile_memory is not None:
+            parser.error("--tile-memory renders in tiles through matplotlib, it can't be combined with --backend raster")
+
+    if args.incremental:
+        # Fragments are drawn with matplotlib and composited as pixels
+        if args.output and not args.output.lower().endswith(".png"):
+            parser.error("--incremental only writes .png files")
+        if args.backend != "matplotlib":
+            parser.error("--incremental draws its fragments with matplotlib, it can't be combined with --backend raster")
+
+    tile_memory = None if args.tile_memory is None else args.tile_memory * 1024 * 1024
+    lod = None if args.lod == "auto" else args.lod
+
+    days = None if args.all_days else (args.days or ['Day 1'])
+    if (args.scene or args.save_scene) and (args.incremental or days is None or len(days) != 1):
+        parser.error("--scene and --save-scene draw one day, without --incremental")
+    if (days is None or len(days) > 1) and args.output and "{day}" not in args.output:
+        # Otherwise every day would be saved over the same file (or workers would write it at the same time)
+        parser.error("--output needs a {day} placeholder when drawing more than one day, e.g. poster_{day}.png")
+
+    from ingest import available_days, load_days
+
+    # Load the rows from the CSV file (read in chunks, with typed columns and parsed start/end times)
+    try:
+        df = None if args.scene else load_days(args.csv, days)
+    except ValueError as err:
+        # e.g. an Energy Level that isn't low, medium or high
+        parser.error(str(err))
+
+    if df is not None and days is not None:
+        missing = [day for day in days if day not in set(df['Day'])]
+        if missing:
+            parser.error(f"no rows for {', '.join(missing)} in {args.csv}, "
+                         f"the days in it are: {', '.join(available_days(args.csv))}")
+
+    if args.headless:
+        from headless import use_agg
+
+        use_agg()
+
+    if args.incremental:
+        from incremental import IncrementalRenderer, render_incremental
+
+        if args.profile:
+            start_profile()
+        renderer = IncrementalRenderer(dpi=args.dpi, cache_dir=args.incremental, layout=args.layout, lod=lod)
+        if tile_memory is not None:
+            renderer.memory_budget = tile_memory
+        single_day = days is not None and len(days) == 1
+        output_pattern = args.output or ("timeline_visualization.png" if single_day else "timeline_{day}.png")
+        render_incremental(df, output_pattern=output_pattern, seed=args.seed or 0, renderer=renderer)
+        if args.profile == "-":
+            print(stop_profile().summary())
+        elif args.profile:
+            stop_profile().save(args.profile)
+    elif days is not None and len(days) == 1:
+        if args.profile:
+            start_profile()
+        scene = None
+        if args.scene:
+            from scene import Scene
+
+            scene = Scene.load(args.scene)
+        elif args.save_scene:
+            from scene import layout_scene
+
+            # Lay the day out once, save it, and draw the saved layout
+            scene = layout_scene(df, activity_colors, rng=np.random.default_rng(args.seed), layout=args.layout, lod=lod,
+                                 dpi=args.dpi)
+            scene.save(args.save_scene)
+            print(f"Scene: {scene.stats()} saved to {args.save_scene}")
+        # Draw the timeline
+        draw_timeline(df, activity_colors, rng=np.random.default_rng(args.seed),
+                      output_path=args.output or "timeline_visualization.png", show=not args.headless,
+                      tile_memory=tile_memory, dpi=args.dpi, layout=args.layout, backend=args.backend, lod=lod,
+                      scene=scene)
+        if args.profile == "-":
+            print(stop_profile().summary())
+        elif args.profile:
+            stop_profile().save(args.profile)
+    else:
+        profiles = {} if args.profile else None
+        if args.headless and args.workers is None:
+            # One figure reused for every day in this process
+            render_batch(df, output_pattern=args.output or "timeline_{day}.png", seed=args.seed,
+                         tile_memory=tile_memory, profiles=profiles, layout=args.layout, backend=args.backend,
+                         lod=lod, dpi=args.dpi)
+        else:
+            render_days(df, output_pattern=args.output or "timeline_{day}.png", workers=args.workers, seed=args.seed,
+                        tile_memory=tile_memory, profiles=profiles, layout=args.layout, backend=args.backend,
+                        lod=lod, dpi=args.dpi)
+        if args.profile == "-":
+            for day, report in profiles.items():
+                print(f"{day}\n{format_summary(report)}")
+        elif args.profile:
+            with open(args.profile, "w") as file:
+                json.dump(profiles, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+#python script to draw the spiral and magic wand artwork for the tote bag
+# matplotlib is only imported inside the functions that draw, so importing this module stays cheap
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
 from PIL import Image
 
+from sparkles import draw_sparkle_trail
+from stars import StarBatch, star_vertices
+
 # Function to generate spiral path
 def generate_spiral_path(num_points, radius):
     theta = np.linspace(0, 6 * np.pi, num_points)  # More rotations for a larger spiral
@@ -20,83 +25,100 @@ def generate_spiral_path(num_points, radius):
 
 # Function to create a gold star
 def create_star(center_x, center_y, size, color='gold'):
-    angles = np.linspace(0, 2 * np.pi, 11)  # 10 points + closing point
-    radius_outer = size
-    radius_inner = size / 2.5
+    from matplotlib.patches import Polygon
 
-    star_points = []
-    for i, angle in enumerate(angles[:-1]):  # Skip last point to avoid duplication
-        radius = radius_outer if i % 2 == 0 else radius_inner
-        star_points.append((center_x + radius * np.cos(angle), center_y + radius * np.sin(angle)))
+    star_points = star_vertices(center_x, center_y, size)[0]  # 10 points, alternating outer and inner radius
 
     return Polygon(star_points, closed=True, facecolor=color, edgecolor='black', lw=1.5, zorder=3)
 
-# Load the magic wand image
-magic_wand = Image.open("icons/bigger_wand_withstart.png")
-
-# Resize the image (increase the width and height to make it larger)
-new_width = 500  # Increase the width to make it larger
-new_height = 500  # Increase the height to make it larger
-resized_wand = magic_wand.resize((new_width, new_height), Image.Resampling.LANCZOS)
+# Function to load the magic wand image
+def load_magic_wand():
+    magic_wand = Image.open("icons/bigger_wand_withstart.png")
 
-# Rotate the resized image if necessary
-rotated_wand = resized_wand.rotate(0, expand=True)  # Rotate if needed (0 degrees in this case)
+    # Resize the image (increase the width and height to make it larger)
+    new_width = 500  # Increase the width to make it larger
+    new_height = 500  # Increase the height to make it larger
+    resized_wand = magic_wand.resize((new_width, new_height), Image.Resampling.LANCZOS)
 
-# Generate the spiral path
-x_spiral, y_spiral = generate_spiral_path(num_points=150, radius=15)  # Increased radius for a larger spiral
+    # Rotate the resized image if necessary
+    return resized_wand.rotate(0, expand=True)  # Rotate if needed (0 degrees in this case)
 
 # Function to create a larger sparkle trail between activities
-def create_sparkle_trail(ax, x, y, num_sparkles=500):  # Increased num_sparkles for a larger trail
-    for index in range(len(x) - 1):
-        # Generate sparkle points between consecutive activities
-        x_sparkles = np.linspace(x[index], x[index + 1], num_sparkles)
-        y_sparkles = np.linspace(y[index], y[index + 1], num_sparkles)
-        x_sparkles += np.random.uniform(-0.5, 0.5, size=num_sparkles)  # Larger random offset
-        y_sparkles += np.random.uniform(-0.5, 0.5, size=num_sparkles)  # Larger random offset
-        sizes = np.random.rand(num_sparkles) * 30  # Larger size for sparkles
-        colors = np.random.rand(num_sparkles)
-        ax.scatter(x_sparkles, y_sparkles, s=sizes, c=colors, marker='*', cmap='cividis', alpha=0.9, zorder=-1)
+def create_sparkle_trail(ax, x, y, density=40, rng=None):  # Sparkles per unit of path length, spread evenly along it
+    # Larger random offset and larger size for sparkles, drawn as one scatter for the whole spiral
+    draw_sparkle_trail(ax, x, y, density=density, jitter=0.5, max_size=30, rng=rng)
 
 # Function to add single gold stars along the path
-def add_single_gold_stars(ax, x, y, num_stars=8, star_size_range=(12, 13), start_after=10, space_between=5):
+def add_single_gold_stars(ax, x, y, num_stars=8, star_size_range=(12, 13), start_after=10, space_between=5, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+
     # Select indices with space between them
     star_indices = range(start_after, len(x), space_between)  # Choose single stars with spacing
     x_stars = x[star_indices]
     y_stars = y[star_indices]
     
-    # Plot the stars with large sizes and gold color
-    for x_star, y_star in zip(x_stars, y_stars):
-        star_size = np.random.randint(*star_size_range)  # Random size for each star
-        star = create_star(x_star, y_star, star_size, color='gold')
-        ax.add_patch(star)  # Add the star as a patch to the plot
+    # Plot the stars with large sizes and gold color, all in one collection
+    star_sizes = rng.integers(*star_size_range, size=len(x_stars))  # Random size for each star
+    stars = StarBatch(ax)
+    for x_star, y_star, star_size in zip(x_stars, y_stars, star_sizes):
+        stars.add(x_star, y_star, star_size, color='gold', zorder=3)
+    stars.flush()
+
+# Function to draw the tote artwork and save it as an SVG
+def draw_tote(output_path="spiral_magic_wand_centered.svg", show=True, rng=None):
+    import matplotlib.pyplot as plt
+
+    # Generate the spiral path
+    x_spiral, y_spiral = generate_spiral_path(num_points=150, radius=15)  # Increased radius for a larger spiral
+
+    # Plotting setup
+    fig, ax = plt.subplots(figsize=(40, 32))  # Increased the figure size
+    ax.set_xlim(-50, 250)  # Adjusted limits to provide more space
+    ax.set_ylim(-50, 250)  # Adjusted limits to provide more space
+    ax.axis('off')  # Hide the axes
+
+    # Plot the spiral path
+    ax.plot(x_spiral, y_spiral, color='gray', lw=2, zorder=1)
+
+    # Add sparkle trail starting from the wand's tip (wand's tip is the first point of the spiral)
+    create_sparkle_trail(ax, x_spiral, y_spiral, rng=rng)
+
+    # Add single gold stars along the path, starting after the 50th point, with space between them
+    add_single_gold_stars(ax, x_spiral, y_spiral, num_stars=8, star_size_range=(12, 13), start_after=50, space_between=9,
+                          rng=rng)
+
+    # Add the wand image at the start of the spiral (position 0) to represent the tip
+    wand_x = x_spiral[0]
+    wand_y = y_spiral[0] - 10  # Move the wand down further from its original position for more space
+
+    # Convert image to numpy array for display in Matplotlib
+    wand_array = np.array(load_magic_wand())
 
-# Plotting setup
-fig, ax = plt.subplots(figsize=(40, 32))  # Increased the figure size
-ax.set_xlim(-50, 250)  # Adjusted limits to provide more space
-ax.set_ylim(-50, 250)  # Adjusted limits to provide more space
-ax.axis('off')  # Hide the axes
+    # Display the wand image at the start of the spiral (wand's tip)
+    ax.imshow(wand_array, extent=(wand_x - 25, wand_x + 25, wand_y - 25, wand_y + 25), aspect='auto', zorder=10)
 
-# Plot the spiral path
-ax.plot(x_spiral, y_spiral, color='gray', lw=2, zorder=1)
+    # Save the figure to a vector format (SVG), with every sparkle and star shape defined once and reused
+    from svgexport import save_svg
 
-# Add sparkle trail starting from the wand's tip (wand's tip is the first point of the spiral)
-create_sparkle_trail(ax, x_spiral, y_spiral)
+    print(f"SVG: {save_svg(fig, output_path, tight=True)}")
 
-# Add single gold stars along the path, starting after the 50th point, with space between them
-add_single_gold_stars(ax, x_spiral, y_spiral, num_stars=8, star_size_range=(12, 13), start_after=50, space_between=9)
+    # Show the plot
+    if show:
+        plt.show()
+    plt.close(fig)
 
-# Add the wand image at the start of the spiral (position 0) to represent the tip
-wand_x = x_spiral[0]
-wand_y = y_spiral[0] - 10  # Move the wand down further from its original position for more space
 
-# Convert image to numpy array for display in Matplotlib
-wand_array = np.array(rotated_wand)
+# Function to run the script from the command line (also used by "python src tote")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Draw the spiral and magic wand artwork for the tote bag")
+    parser.add_argument("--output", default="spiral_magic_wand_centered.svg", help="SVG file to write")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the sparkle trail")
+    parser.add_argument("--no-show", action="store_true", help="Save without opening a window")
+    args = parser.parse_args(argv)
 
-# Display the wand image at the start of the spiral (wand's tip)
-ax.imshow(wand_array, extent=(wand_x - 25, wand_x + 25, wand_y - 25, wand_y + 25), aspect='auto', zorder=10)
+    draw_tote(args.output, show=not args.no_show, rng=np.random.default_rng(args.seed))
 
-# Save the figure to a vector format (SVG)
-plt.savefig("spiral_magic_wand_centered.svg", format="svg", bbox_inches='tight')  # Save as SVG
 
-# Show the plot
-plt.show()
+if __name__ == "__main__":
+    main()
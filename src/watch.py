@@ -0,0 +1,157 @@
+#python script to redraw a low resolution preview of the timeline every time the csv, the icons or the colors change
+# The process stays running, so matplotlib, pandas and the decoded icons are only loaded once
+import argparse
+import importlib
+import os
+import time
+
+import numpy as np
+
+
+# Function to describe the watched files, so any edit to one of them gives a different snapshot
+def snapshot(paths, icons_dir="icons"):
+    from incremental import icons_signature
+
+    files = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            files.append((path, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            # Some editors delete the file and write a new one when saving
+            files.append((path, None, None))
+    return files, icons_signature(icons_dir)
+
+
+# Keeps one warm process redrawing the preview whenever its inputs change
+class PreviewWatcher:
+    """
+    Polls the csv, the icons folder and timeline7.py (where activity_colors lives) and, once they
+    have stopped changing for the debounce time, redraws the timeline at a low dpi. A burst of saves
+    only gives one render, and a csv caught half written just gives an error until the next save.
+
+    :param csv_path: Activity log to read
+    :param day: Day to draw
+    :param output_path: PNG to write the preview to
+    :param dpi: Resolution of the preview (30 gives a 2160 px square, the full render is 300)
+    :param backend: "raster" or "matplotlib", see draw_timeline
+    :param interval: Seconds between checks for changes
+    :param debounce: Seconds the files have to stay unchanged before redrawing
+    """
+
+    def __init__(self, csv_path="24hour.csv", day="Day 1", output_path="timeline_preview.png", dpi=30,
+                 backend="raster", interval=0.5, debounce=0.5, seed=0, layout="spiral", icons_dir="icons"):
+        from headless import ReusableFigure, use_agg
+
+        use_agg()
+        import timeline7
+
+        self.timeline = timeline7
+        self.csv_path = csv_path
+        self.day = day
+        self.output_path = output_path
+        self.dpi = dpi
+        self.backend = backend
+        self.interval = interval
+        self.debounce = debounce
+        self.seed = seed
+        self.layout = layout
+        self.icons_dir = icons_dir
+        self.figure = ReusableFigure() if backend == "matplotlib" else None
+        self.renders = 0
+
+    def watched(self):
+        return [self.csv_path, self.timeline.__file__]
+
+    # Function to pick up what changed between two snapshots: new colors need timeline7 reloaded, new icons a fresh cache
+    def refresh(self, before, after):
+        from assets import icon_cache
+
+        (files_before, icons_before), (files_after, icons_after) = before, after
+        if files_before[1] != files_after[1]:
+            importlib.reload(self.timeline)
+            print("Reloaded activity colors")
+        if icons_before != icons_after:
+            icon_cache.clear()
+            print("Icons changed, decoding them again")
+
+    # Function to draw the preview once, returning how long it took
+    def render(self):
+        from ingest import load_days
+
+        start = time.perf_counter()
+        df = load_days(self.csv_path, [self.day])
+        self.timeline.draw_timeline(df, self.timeline.activity_colors, rng=np.random.default_rng(self.seed),
+                                    output_path=self.output_path, show=False, dpi=self.dpi, figure=self.figure,
+                                    layout=self.layout, backend=self.backend)
+        self.renders += 1
+        return time.perf_counter() - start
+
+    # Function to render now, reporting a failure (a csv saved half way, a typo in the colors) instead of stopping
+    def try_render(self):
+        try:
+            seconds = self.render()
+        except Exception as error:  # Keep watching, the next save will probably fix it
+            print(f"Preview failed: {type(error).__name__}: {error}")
+            return False
+        print(f"Preview saved to {self.output_path} in {seconds:.1f} s")
+        return True
+
+    # Function to wait until the files stop changing, returning the snapshot they settled on
+    def settle(self, state):
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < self.debounce:
+            time.sleep(self.interval)
+            current = snapshot(self.watched(), self.icons_dir)
+            if current != state:
+                state, quiet_since = current, time.monotonic()
+        return state
+
+    # Function to draw the preview and then redraw it after every change, until interrupted
+    def run(self, max_renders=None):
+        state = snapshot(self.watched(), self.icons_dir)
+        self.try_render()
+        print(f"Watching {self.csv_path}, {self.icons_dir}/ and the activity colors (Ctrl+C to stop)")
+        try:
+            while max_renders is None or self.renders < max_renders:
+                time.sleep(self.interval)
+                current = snapshot(self.watched(), self.icons_dir)
+                if current == state:
+                    continue
+                current = self.settle(current)
+                try:
+                    self.refresh(state, current)
+                except Exception as error:
+                    print(f"Reload failed: {type(error).__name__}: {error}")
+                state = current
+                self.try_render()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.figure is not None:
+                self.figure.release()
+
+
+# Function to run the script from the command line (also used by "python src watch")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Redraw a low resolution timeline preview whenever the csv, the "
+                                                 "icons or the activity colors change")
+    parser.add_argument("--csv", default="24hour.csv", help="Activity log to watch")
+    parser.add_argument("--day", default="Day 1", help="Day to draw")
+    parser.add_argument("--output", default="timeline_preview.png", help="Preview PNG to write")
+    parser.add_argument("--dpi", type=int, default=30, help="Resolution of the preview")
+    parser.add_argument("--backend", choices=["raster", "matplotlib"], default="raster",
+                        help="Renderer for the preview (raster is the quickest)")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between checks for changes")
+    parser.add_argument("--debounce", type=float, default=0.5,
+                        help="Seconds the files have to stay unchanged before redrawing")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the sparkle trail")
+    parser.add_argument("--layout", choices=["spiral", "arc"], default="spiral", help="See timeline --layout")
+    args = parser.parse_args(argv)
+
+    PreviewWatcher(args.csv, args.day, args.output, args.dpi, args.backend, args.interval, args.debounce, args.seed,
+                   args.layout).run()
+
+
+if __name__ == "__main__":
+    main()
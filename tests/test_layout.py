@@ -0,0 +1,41 @@
+#python tests for the arc layout: no two drawn activities may overlap, whatever the nudge counter says
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from layout import arc_spiral_path, footprint, footprints_overlap, scaled_footprint  # noqa: E402
+
+first_burst = 7
+
+
+# Function to find every pair of drawn activities whose footprints overlap, by checking all pairs
+def overlapping_pairs(x, y, boxes, first):
+    return [(i, j) for i in range(first, len(x)) for j in range(i + 1, len(x))
+            if footprints_overlap(x[i], y[i], x[j], y[j], boxes)]
+
+
+def test_footprints_overlap_checks_every_box():
+    # Side by side with the halos just apart, but one's start time label under the other's description
+    assert not footprints_overlap(0, 0, 30, 0, footprint)
+    assert footprints_overlap(0, 0, 5, -25, footprint)
+    assert not footprints_overlap(0, 0, 0, -40, footprint)
+
+
+# Days 2 and 1 of 24hour.csv have 16 and 20 rows, the others are bigger logs with the footprint scaled down
+@pytest.mark.parametrize("num_points", [16, 20, 40, 100, 1000])
+def test_arc_layout_footprints_do_not_overlap(num_points):
+    report = {}
+    x, y = arc_spiral_path(num_points, 50, first=first_burst, report=report)
+    boxes = scaled_footprint(footprint, report["scale"])[0]
+
+    assert report["unresolved"] == 0
+    assert overlapping_pairs(x, y, boxes, first_burst) == []
+
+
+def test_day_one_keeps_full_size_footprint():
+    report = {}
+    arc_spiral_path(20, 50, first=first_burst, report=report)
+    assert report["scale"] == 1.0
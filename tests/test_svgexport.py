@@ -0,0 +1,27 @@
+#python tests for the SVG export of the timeline
+import os
+import sys
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(root, "src"))
+
+import numpy as np  # noqa: E402
+
+from ingest import load_days  # noqa: E402
+from timeline7 import activity_colors, draw_timeline  # noqa: E402
+
+
+def test_one_row_day_exports_to_svg(tmp_path, monkeypatch):
+    # The icons are found relative to the repo, and one row leaves the sparkle trail with no points at all
+    monkeypatch.chdir(root)
+    df = load_days("24hour.csv", ["Day 1"]).head(1)
+    output_path = tmp_path / "one_row.svg"
+
+    draw_timeline(df, activity_colors, rng=np.random.default_rng(0), output_path=str(output_path), show=False,
+                  figsize=(8, 8), lod="thumbnail")
+
+    assert output_path.read_text().lstrip().startswith("<")